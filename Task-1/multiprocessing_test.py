@@ -1,50 +1,41 @@
-from do_something import do_something   # imports your function
-import time
-import multiprocessing
-import threading
+# multiprocessing_test.py
+# Quick multiprocessing vs multithreading comparison. For a full sweep over
+# worker counts, sizes and start methods use scaling_benchmark.py.
+# Set PROFILE_WORKERS=<directory> to profile the workers as well, and
+# CPU_PLACEMENT=compact|spread|reserve|none to choose the CPU placement.
+from cpu_placement import CpuUsage, plan
+from scaling_benchmark import run_once
+from worker_profiler import report, reset
 
 if __name__ == "__main__":
+    reset()  # Drop worker profiles of earlier runs (if profiling)
+
     size = 10000     # how much work each process/thread does
-    procs = 10            # number of processes
-    jobs = []
+    placement = plan()    # one worker per usable CPU, pinned
+    procs = placement.workers     # number of processes
+    threads = placement.workers   # number of threads
+    tasks = 10            # number of do_something calls
+    print(f"Placement: {placement.describe()}")
+    placement.pin_coordinator()
 
     # -----------------------------
     # MULTIPROCESSING SECTION
     # -----------------------------
-    start_time = time.time()
-    for i in range(procs):
-        out_list = list()
-        process = multiprocessing.Process(target=do_something, args=(size, out_list))
-        jobs.append(process)
-
-    for j in jobs:
-        j.start()
-
-    for j in jobs:
-        j.join()
-
+    with CpuUsage() as usage:
+        wall, cpu = run_once("process", procs, size, tasks,
+                             placement=placement)
     print("List processing complete.")
-    end_time = time.time()
-    print("Multiprocessing time =", end_time - start_time)
+    print("Multiprocessing time =", wall)
+    print(usage.format(placement))
 
     # -----------------------------
     # MULTITHREADING SECTION
     # -----------------------------
-    jobs = []
-    threads = 10
-    start_time = time.time()
-
-    for i in range(threads):
-        out_list = list()
-        thread = threading.Thread(target=do_something, args=(size, out_list))
-        jobs.append(thread)
-
-    for l in jobs:
-        l.start()
-
-    for l in jobs:
-        l.join()
-
+    with CpuUsage() as usage:
+        wall, cpu = run_once("thread", threads, size, tasks,
+                             placement=placement)
     print("List processing complete.")
-    end_time = time.time()
-    print("Multithreading time =", end_time - start_time)
+    print("Multithreading time =", wall)
+    print(usage.format(placement))
+
+    report()  # Merged worker profile (only if profiling)
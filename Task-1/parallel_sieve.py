@@ -0,0 +1,148 @@
+# parallel_sieve.py
+import itertools
+import math
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from do_something import prime_summary, primes_below, sieve_segment
+
+# Odd numbers per segment. One segment's flags (256 KiB) fit in a typical
+# L2 cache, so the crossing-off loops stay in cache.
+SEGMENT_SIZE = 1 << 18
+
+# Per-worker state, set once by _init_worker
+_shm = None
+_base_primes = None
+
+
+def _init_worker(shm_name, size):
+    """
+    Pool initializer.
+
+    Attaches to the shared bitmap and computes the base primes locally, so
+    neither the bitmap nor any list of primes is pickled per task.
+    """
+    global _shm, _base_primes
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _base_primes = primes_below(math.isqrt(max(size - 1, 0)) + 1)[1:]
+
+
+def _sieve_task(bounds):
+    """
+    Sieves one segment straight into the shared bitmap.
+
+    Returns only the segment's prime count and largest prime.
+    """
+    jlo, jhi = bounds
+    flags = sieve_segment(jlo, jhi, _base_primes)
+    _shm.buf[jlo:jhi] = flags
+    j = flags.rfind(1)
+    return flags.count(1), 2 * (jlo + j) + 1 if j >= 0 else None
+
+
+class SharedSieve:
+    """
+    Result of parallel_sieve.
+
+    Owns the shared-memory bitmap. 'flags' is a zero-copy view of it:
+    flags[j] == 1 when 2*j + 1 is prime (2 is implied). Call close() (or
+    use the object as a context manager) to free the shared memory; any
+    views taken from 'flags' must be released first.
+    """
+
+    def __init__(self, shm, size, prime_count, largest_prime):
+        self.size = size
+        self.prime_count = prime_count
+        self.largest_prime = largest_prime
+        self._shm = shm
+        self.flags = shm.buf[:max(size // 2, 0)]
+
+    def is_prime(self, n):
+        """Checks one number below 'size' against the bitmap."""
+        if n < 2 or n >= self.size:
+            return False
+        if n % 2 == 0:
+            return n == 2
+        return self.flags[n // 2] == 1
+
+    def primes(self):
+        """Yields the primes below 'size' in increasing order."""
+        if self.size > 2:
+            yield 2
+        for j in itertools.compress(range(len(self.flags)), self.flags):
+            yield 2 * j + 1
+
+    def summary(self):
+        """Returns the prime fields of the do_something result record."""
+        return {'prime_count': self.prime_count,
+                'largest_prime': self.largest_prime}
+
+    def close(self):
+        """Releases the view and unlinks the shared memory."""
+        if self._shm is None:
+            return
+        self.flags.release()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parallel_sieve(size, processes=None, segment_size=SEGMENT_SIZE,
+                   context=None):
+    """
+    Finds the primes in [2, size) with a segmented sieve on a process pool.
+
+    The odd numbers below 'size' are split into segments of
+    'segment_size'. Each worker sieves its segments locally and copies
+    them into one shared-memory bitmap; only (count, largest) pairs travel
+    back through the pool.
+
+    Args:
+        size (int): Exclusive upper bound
+        processes (int): Number of worker processes (default: CPU count)
+        segment_size (int): Odd numbers per segment
+        context: multiprocessing context to start the pool with
+
+    Returns:
+        SharedSieve: The bitmap and the prime_count/largest_prime summary
+    """
+    ctx = context or multiprocessing.get_context()
+    n = max(size // 2, 0)
+    shm = shared_memory.SharedMemory(create=True, size=max(n, 1))
+    try:
+        segments = [(jlo, min(jlo + segment_size, n))
+                    for jlo in range(0, n, segment_size)]
+        prime_count = 1 if size > 2 else 0
+        largest_prime = 2 if size > 2 else None
+        with ctx.Pool(processes, _init_worker, (shm.name, size)) as pool:
+            for count, largest in pool.imap_unordered(_sieve_task, segments):
+                prime_count += count
+                if largest is not None and largest > largest_prime:
+                    largest_prime = largest
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return SharedSieve(shm, size, prime_count, largest_prime)
+
+
+if __name__ == "__main__":
+    size = 20_000_000
+
+    start_time = time.perf_counter()
+    count, largest = prime_summary(size)
+    print(f"Single process: {count} primes, largest {largest}, "
+          f"time = {time.perf_counter() - start_time:.3f}s")
+
+    start_time = time.perf_counter()
+    with parallel_sieve(size) as sieve:
+        elapsed = time.perf_counter() - start_time
+        print(f"Parallel sieve: {sieve.prime_count} primes, "
+              f"largest {sieve.largest_prime}, time = {elapsed:.3f}s")
+        print("Is 19999999 prime?", sieve.is_prime(19_999_999))
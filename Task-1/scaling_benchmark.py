@@ -0,0 +1,229 @@
+# scaling_benchmark.py
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from do_something import set_quiet
+from task_executor import get_executor
+
+BACKENDS = ("process", "thread")
+# Backends that start worker processes, and so depend on the start method
+PROCESS_BACKENDS = ("process", "pool", "pipe")
+MODES = ("strong", "weak")
+
+FIELDS = ["mode", "backend", "start_method", "size", "workers", "tasks",
+          "repeat", "wall_median", "wall_min", "cpu_mean", "speedup",
+          "efficiency"]
+
+
+def _cpu_time():
+    """CPU time of this process plus all of its reaped children."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def run_once(backend, workers, size, tasks, start_method=None,
+             placement=None):
+    """
+    Times one batch of 'tasks' do_something(size) calls.
+
+    Executor start-up and shutdown are part of the measurement, just like
+    creating and joining the workers was in multiprocessing_test.py.
+
+    Args:
+        backend (str): Any task_executor backend (process, thread, pool,
+            pipe or inline)
+        workers (int): Number of worker processes/threads
+        size (int): Workload size of each task
+        tasks (int): Number of tasks in the batch
+        start_method (str): fork, spawn or forkserver (process backends)
+        placement (cpu_placement.Placement): Pins every worker to its CPU
+
+    Returns:
+        tuple: (wall seconds, CPU seconds). CPU seconds is None under
+        forkserver: its workers are children of the fork server, so
+        their time never shows up in os.times() of this process.
+    """
+    ctx = None
+    if backend in PROCESS_BACKENDS:
+        ctx = multiprocessing.get_context(start_method)
+    cpu_known = ctx is None or ctx.get_start_method() != "forkserver"
+    initializer, initargs, options = None, (), {}
+    if placement is not None:
+        if backend == "process" and placement.cpus:
+            # One process per task: pin each to the CPU of a free slot
+            options['cpus'] = placement.cpus
+        else:
+            initializer, initargs = placement.worker_init(ctx)
+
+    cpu_start = _cpu_time()
+    wall_start = time.perf_counter()
+    with get_executor(backend, workers, ctx, initializer,
+                      initargs, **options) as executor:
+        executor.map([size] * tasks)
+    wall = time.perf_counter() - wall_start
+    return wall, _cpu_time() - cpu_start if cpu_known else None
+
+
+def measure(backend, workers, size, tasks, start_method=None, repeat=3,
+            warmup=1):
+    """
+    Repeats run_once after 'warmup' untimed runs.
+
+    Returns:
+        dict: wall_median, wall_min and cpu_mean over the timed runs
+        (cpu_mean is None when the CPU time cannot be measured)
+    """
+    for _ in range(warmup):
+        run_once(backend, workers, size, tasks, start_method)
+    walls, cpus = [], []
+    for _ in range(repeat):
+        wall, cpu = run_once(backend, workers, size, tasks, start_method)
+        walls.append(wall)
+        cpus.append(cpu)
+    return {
+        'wall_median': statistics.median(walls),
+        'wall_min': min(walls),
+        'cpu_mean': None if None in cpus else statistics.fmean(cpus)
+    }
+
+
+def scaling_study(workers_list, sizes, backends=BACKENDS, start_methods=None,
+                  modes=MODES, tasks=16, tasks_per_worker=2, repeat=3,
+                  warmup=1, log=print):
+    """
+    Sweeps worker counts, sizes, backends and start methods.
+
+    Strong scaling keeps the total work fixed at 'tasks' tasks; weak
+    scaling gives every worker 'tasks_per_worker' tasks. The single-worker
+    run of each series is the baseline: strong speedup is T1 / Tn, weak
+    (scaled) speedup is n * T1 / Tn, and efficiency is speedup / n.
+
+    Args:
+        workers_list (list): Worker counts; 1 is added if missing
+        sizes (list): Workload sizes
+        backends (list): task_executor backends, e.g. "process", "thread"
+        start_methods (list): Start methods for the process-based backends
+            (default: every method this platform supports)
+        modes (list): Any of "strong" and "weak"
+        tasks (int): Total tasks per strong-scaling run
+        tasks_per_worker (int): Tasks per worker in weak-scaling runs
+        repeat (int): Timed runs per point
+        warmup (int): Untimed runs per point
+        log: Called with a progress line per point (None for silence)
+
+    Returns:
+        list: One dict per measured point, with the keys in FIELDS
+    """
+    workers_list = sorted(set(workers_list) | {1})
+    if start_methods is None:
+        start_methods = multiprocessing.get_all_start_methods()
+
+    rows = []
+    for mode in modes:
+        for backend in backends:
+            methods = (start_methods if backend in PROCESS_BACKENDS
+                       else [None])
+            for start_method in methods:
+                for size in sizes:
+                    baseline = None
+                    for workers in workers_list:
+                        n_tasks = (tasks if mode == "strong"
+                                   else tasks_per_worker * workers)
+                        stats = measure(backend, workers, size, n_tasks,
+                                        start_method, repeat, warmup)
+                        if baseline is None:
+                            baseline = stats['wall_median']
+                        speedup = baseline / stats['wall_median']
+                        if mode == "weak":
+                            speedup *= workers
+                        row = {
+                            'mode': mode,
+                            'backend': backend,
+                            'start_method': start_method or "-",
+                            'size': size,
+                            'workers': workers,
+                            'tasks': n_tasks,
+                            'repeat': repeat,
+                            **stats,
+                            'speedup': speedup,
+                            'efficiency': speedup / workers
+                        }
+                        rows.append(row)
+                        if log:
+                            log(format_row(row))
+    return rows
+
+
+def format_row(row):
+    """Formats one result row as a fixed-width table line."""
+    cpu = (f"{row['cpu_mean']:.4f}s" if row['cpu_mean'] is not None
+           else "n/a")
+    return (f"{row['mode']:<6} {row['backend']:<7} {row['start_method']:<10} "
+            f"size={row['size']:<8} workers={row['workers']:<3} "
+            f"tasks={row['tasks']:<4} wall={row['wall_median']:.4f}s "
+            f"cpu={cpu} speedup={row['speedup']:.2f} "
+            f"efficiency={row['efficiency']:.2f}")
+
+
+def write_json(rows, path):
+    with open(path, "w") as f:
+        json.dump(rows, f, indent=2)
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def _str_list(text):
+    return [x for x in text.split(",") if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Strong/weak scaling study of do_something.")
+    parser.add_argument("--workers", type=_int_list,
+                        default=[1, 2, 4, os.cpu_count() or 1],
+                        help="comma-separated worker counts")
+    parser.add_argument("--sizes", type=_int_list, default=[10000],
+                        help="comma-separated workload sizes")
+    parser.add_argument("--backends", type=_str_list, default=list(BACKENDS),
+                        help="process,thread,pool,pipe,inline")
+    parser.add_argument("--start-methods", type=_str_list, default=None,
+                        help="fork,spawn,forkserver (default: all available)")
+    parser.add_argument("--modes", type=_str_list, default=list(MODES))
+    parser.add_argument("--tasks", type=int, default=16,
+                        help="total tasks per strong-scaling run")
+    parser.add_argument("--tasks-per-worker", type=int, default=2,
+                        help="tasks per worker in weak-scaling runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true",
+                        help="keep the per-call do_something output")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--csv", help="write the results to this CSV file")
+    args = parser.parse_args(argv)
+    if not args.verbose:
+        set_quiet()  # Printing would serialize workers on stdout
+
+    rows = scaling_study(args.workers, args.sizes, args.backends,
+                         args.start_methods, args.modes, args.tasks,
+                         args.tasks_per_worker, args.repeat, args.warmup)
+    if args.json:
+        write_json(rows, args.json)
+    if args.csv:
+        write_csv(rows, args.csv)
+
+
+if __name__ == "__main__":
+    main()
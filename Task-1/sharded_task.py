@@ -0,0 +1,129 @@
+# sharded_task.py
+import math
+import multiprocessing
+import time
+from do_something import (MATH_CHUNK, do_something, is_quiet, math_partials,
+                          prime_range_summary, print_result, set_quiet)
+
+
+def shard_ranges(size, shards):
+    """
+    Splits [0, size) into at most 'shards' disjoint [lo, hi) ranges.
+
+    Every boundary except 'size' itself is a multiple of MATH_CHUNK, so
+    the shards' math chunks are exactly the chunks math_stage(size) uses.
+
+    Args:
+        size (int): Exclusive upper bound
+        shards (int): Desired number of shards
+
+    Returns:
+        list: (lo, hi) pairs covering [0, size) in order
+    """
+    if size <= 0:
+        return []
+    chunks = -(-size // MATH_CHUNK)
+    per_shard = -(-chunks // max(shards, 1)) * MATH_CHUNK
+    return [(lo, min(lo + per_shard, size))
+            for lo in range(0, size, per_shard)]
+
+
+def run_shard(task):
+    """
+    Map step: both stages of do_something over one shard.
+
+    Args:
+        task (tuple): (shard index, lo, hi, math backend)
+
+    Returns:
+        tuple: (shard index, prime_count, largest_prime, chunk sums)
+    """
+    index, lo, hi, math_backend = task
+    prime_count, largest_prime = prime_range_summary(lo, hi)
+    return (index, prime_count, largest_prime,
+            list(math_partials(lo, hi, math_backend)))
+
+
+def merge_shards(parts):
+    """
+    Reduce step: merges shard results into a do_something record.
+
+    The chunk sums are put back in shard order and combined with a single
+    math.fsum. fsum is correctly rounded, so the result would not depend
+    on the order anyway, and it equals math_stage(size) bit for bit
+    because the chunks are the same.
+
+    Args:
+        parts (list): run_shard() results, in any order
+
+    Returns:
+        dict: The do_something record
+    """
+    parts = sorted(parts)
+    prime_count = sum(p[1] for p in parts)
+    largest = [p[2] for p in parts if p[2] is not None]
+    return {
+        'prime_count': prime_count,
+        'math_result': math.fsum(s for p in parts for s in p[3]),
+        'largest_prime': max(largest) if largest else None
+    }
+
+
+def sharded_do_something(size, out_list, shards=None, pool=None,
+                         processes=None, math_backend="auto", quiet=None):
+    """
+    Runs one do_something call as a map-reduce over range shards.
+
+    [0, size) is split into MATH_CHUNK-aligned shards (shard_ranges); each
+    shard counts its primes with a segmented sieve and sums its math
+    chunks, and the shards are merged with merge_shards. The record is
+    identical to do_something(size, ...) for any shard count and any
+    completion order.
+
+    Args:
+        size (int): The range up to which to perform computations
+        out_list (list): Output list to store results
+        shards (int): Number of shards (default: 4 per pool process)
+        pool: multiprocessing Pool to use (default: a new one)
+        processes (int): Processes of the new pool (default: CPU count)
+        math_backend (str): "numpy", "python" or "auto"
+        quiet (bool): Skip the summary line (default: is_quiet())
+
+    Returns:
+        float: The math result, like do_something
+    """
+    processes = processes or multiprocessing.cpu_count()
+    shards = shards or 4 * processes
+    tasks = [(i, lo, hi, math_backend)
+             for i, (lo, hi) in enumerate(shard_ranges(size, shards))]
+    if pool is None:
+        with multiprocessing.Pool(processes) as own_pool:
+            parts = list(own_pool.imap_unordered(run_shard, tasks))
+    else:
+        parts = list(pool.imap_unordered(run_shard, tasks))
+
+    record = merge_shards(parts)
+    out_list.append(record)
+    if not (is_quiet() if quiet is None else quiet):
+        print_result(record)
+    return record['math_result']
+
+
+if __name__ == "__main__":
+    set_quiet()
+    size = 20_000_000
+
+    start = time.perf_counter()
+    expected = []
+    do_something(size, expected)
+    print(f"do_something        : {time.perf_counter() - start:.3f}s")
+
+    with multiprocessing.Pool() as pool:
+        for shards in (1, 4, 16, 64):
+            start = time.perf_counter()
+            out_list = []
+            sharded_do_something(size, out_list, shards, pool)
+            elapsed = time.perf_counter() - start
+            same = "identical" if out_list == expected else "DIFFERENT"
+            print(f"{shards:>3} shards ({len(shard_ranges(size, shards)):>3} "
+                  f"used): {elapsed:.3f}s, record {same}")
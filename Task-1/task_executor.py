@@ -0,0 +1,421 @@
+# task_executor.py
+import collections
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import wait
+from cpu_placement import pin
+from do_something import do_something
+from worker_profiler import profiled
+
+
+@profiled
+def run_task(size, **kwargs):
+    """
+    Runs do_something and returns its result record.
+
+    This is what every backend executes, so results come back as return
+    values instead of being appended to a list the caller cannot see.
+    With PROFILE_WORKERS set, every worker process and thread profiles
+    its tasks (see worker_profiler.py).
+    """
+    out_list = []
+    do_something(size, out_list, **kwargs)
+    return out_list[0]
+
+
+def _started_future():
+    fut = Future()
+    fut.set_running_or_notify_cancel()  # Results arrive from another thread
+    return fut
+
+
+class TaskExecutor:
+    """
+    Common interface of all backends.
+
+    submit(size, **kwargs) returns a concurrent.futures.Future whose result
+    is the do_something record; map(sizes) returns the records in order.
+    Keyword arguments are passed on to do_something.
+    """
+
+    def submit(self, size, **kwargs):
+        raise NotImplementedError
+
+    def map(self, sizes, **kwargs):
+        futures = [self.submit(size, **kwargs) for size in sizes]
+        return [fut.result() for fut in futures]
+
+    def shutdown(self, wait=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+class InlineExecutor(TaskExecutor):
+    """Runs every task immediately in the calling thread."""
+
+    def __init__(self, workers=None, context=None, initializer=None,
+                 initargs=()):
+        pass
+
+    def submit(self, size, **kwargs):
+        fut = _started_future()
+        try:
+            fut.set_result(run_task(size, **kwargs))
+        except Exception as exc:
+            fut.set_exception(exc)
+        return fut
+
+
+class ThreadExecutor(TaskExecutor):
+    """Runs tasks on a pool of threads (shares the GIL)."""
+
+    def __init__(self, workers=None, context=None, initializer=None,
+                 initargs=()):
+        self._executor = ThreadPoolExecutor(workers, initializer=initializer,
+                                            initargs=initargs)
+
+    def submit(self, size, **kwargs):
+        return self._executor.submit(run_task, size, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait)
+
+
+def _process_main(conn, size, kwargs, cpu, initializer, initargs):
+    try:
+        if cpu is not None:
+            pin(cpu)
+        if initializer is not None:
+            initializer(*initargs)
+        conn.send((True, run_task(size, **kwargs)))
+    except Exception as exc:
+        conn.send((False, exc))
+    conn.close()
+
+
+class ProcessExecutor(TaskExecutor):
+    """
+    Starts one new process per task, like the original scripts did.
+
+    At most 'workers' processes run at once. Each process sends its
+    result through its own pipe; a collector thread waits on all of them
+    at once, so a process that dies without a result (os._exit, OOM
+    kill, segfault) shows up as end-of-file and fails its future.
+
+    With 'cpus', every task process is pinned to the CPU of a worker
+    slot that is free right now (slot i runs on cpus[i % len(cpus)]), so
+    a new process takes over the CPU of the one that just finished
+    instead of piling onto a CPU that is still busy.
+    """
+
+    def __init__(self, workers=None, context=None, initializer=None,
+                 initargs=(), cpus=None):
+        self._ctx = context or multiprocessing.get_context()
+        self._workers = workers or self._ctx.cpu_count()
+        self._initializer = initializer
+        self._initargs = initargs
+        self._free_cpus = None  # CPUs of the idle worker slots
+        if cpus:
+            self._free_cpus = collections.deque(
+                cpus[i % len(cpus)] for i in range(self._workers))
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._running = {}  # result connection -> (process, future, cpu)
+        self._shutdown = False
+        # Wakes the collector when the set of running processes changes
+        self._wakeup_reader, self._wakeup_writer = self._ctx.Pipe(False)
+        self._wakeup_sent = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def submit(self, size, **kwargs):
+        fut = _started_future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._pending.append((size, kwargs, fut))
+            failed = self._start_pending()
+            self._wake()
+        for lost, exc in failed:
+            lost.set_exception(exc)
+        return fut
+
+    def _wake(self):
+        # At most one wake-up in flight, so the pipe never fills up
+        if not self._wakeup_sent:
+            self._wakeup_sent = True
+            self._wakeup_writer.send(None)
+
+    def _start_pending(self):
+        """
+        Starts queued tasks while there are free workers; call with the
+        lock held. Returns (future, exception) for every task that could
+        not be started (e.g. unpicklable arguments under spawn), to be
+        failed once the lock is released.
+        """
+        failed = []
+        while self._pending and len(self._running) < self._workers:
+            size, kwargs, fut = self._pending.popleft()
+            cpu = self._free_cpus.popleft() if self._free_cpus else None
+            reader, writer = self._ctx.Pipe(False)
+            try:
+                process = self._ctx.Process(
+                    target=_process_main,
+                    args=(writer, size, kwargs, cpu, self._initializer,
+                          self._initargs))
+                process.start()
+            except Exception as exc:
+                reader.close()
+                writer.close()
+                if cpu is not None:
+                    self._free_cpus.append(cpu)
+                failed.append((fut, exc))
+                continue
+            writer.close()  # Only the child writes; EOF once it exits
+            self._running[reader] = (process, fut, cpu)
+        return failed
+
+    def _collect(self):
+        while True:
+            with self._lock:
+                if (self._shutdown and not self._running
+                        and not self._pending):
+                    break
+                conns = list(self._running)
+            for conn in wait(conns + [self._wakeup_reader]):
+                if conn is self._wakeup_reader:
+                    conn.recv()
+                    with self._lock:
+                        self._wakeup_sent = False
+                    continue
+                try:
+                    ok, value = conn.recv()
+                except EOFError:
+                    ok = None
+                with self._lock:
+                    process, fut, cpu = self._running.pop(conn)
+                    if cpu is not None:
+                        self._free_cpus.append(cpu)
+                conn.close()
+                process.join()
+                if ok is None:
+                    fut.set_exception(RuntimeError(
+                        f"task process exited with code {process.exitcode} "
+                        f"without a result"))
+                elif ok:
+                    fut.set_result(value)
+                else:
+                    fut.set_exception(value)
+                with self._lock:
+                    failed = self._start_pending()
+                for lost, exc in failed:
+                    lost.set_exception(exc)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._shutdown = True
+            self._wake()
+        if wait:
+            self._collector.join()  # Returns once every task has finished
+
+
+class PoolExecutor(TaskExecutor):
+    """
+    Runs tasks on a multiprocessing.Pool.
+
+    map() uses Pool.map with chunking, so many small tasks cost few
+    round trips.
+    """
+
+    def __init__(self, workers=None, context=None, initializer=None,
+                 initargs=(), chunksize=None):
+        ctx = context or multiprocessing.get_context()
+        self._pool = ctx.Pool(workers, initializer, initargs)
+        self._chunksize = chunksize
+
+    def submit(self, size, **kwargs):
+        fut = _started_future()
+        self._pool.apply_async(run_task, (size,), kwargs,
+                               callback=fut.set_result,
+                               error_callback=fut.set_exception)
+        return fut
+
+    def map(self, sizes, **kwargs):
+        if kwargs:
+            return super().map(sizes, **kwargs)
+        return self._pool.map(run_task, sizes, self._chunksize)
+
+    def shutdown(self, wait=True):
+        self._pool.close()
+        if wait:
+            self._pool.join()
+
+
+def _pipe_main(conn, initializer, initargs):
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            conn.send(None)  # Acknowledge: no more results on this pipe
+            break
+        task_id, size, kwargs = msg
+        try:
+            conn.send((task_id, True, run_task(size, **kwargs)))
+        except Exception as exc:
+            conn.send((task_id, False, exc))
+    conn.close()
+
+
+class PipeExecutor(TaskExecutor):
+    """
+    Long-lived worker processes, each fed through its own duplex Pipe.
+
+    Each task goes to the live worker with the fewest outstanding tasks.
+    A collector thread waits on all pipes at once and resolves the
+    futures; a worker that dies fails its outstanding tasks and gets no
+    new ones.
+    """
+
+    def __init__(self, workers=None, context=None, initializer=None,
+                 initargs=()):
+        ctx = context or multiprocessing.get_context()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._conns = []
+        self._processes = []
+        self._outstanding = {}  # conn -> {task_id: future}
+        self._send_locks = {}   # conn -> lock serializing sends on it
+        for _ in range(workers or ctx.cpu_count()):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_pipe_main,
+                                  args=(child_conn, initializer, initargs),
+                                  daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+            self._outstanding[parent_conn] = {}
+            self._send_locks[parent_conn] = threading.Lock()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def submit(self, size, **kwargs):
+        fut = _started_future()
+        while True:
+            with self._lock:
+                if not self._conns:
+                    raise RuntimeError("no pipe workers left")
+                conn = min(self._conns,
+                           key=lambda c: len(self._outstanding[c]))
+                task_id = next(self._ids)
+                self._outstanding[conn][task_id] = fut
+            # Sending may block until the worker reads; the collector must
+            # still be able to take self._lock meanwhile to drain its results
+            try:
+                with self._send_locks[conn]:
+                    conn.send((task_id, size, kwargs))
+                return fut
+            except OSError:
+                # The worker is gone; stop routing to it and try another
+                with self._lock:
+                    self._outstanding[conn].pop(task_id, None)
+                    self._retire(conn)
+
+    def _retire(self, conn):
+        # Call with the lock held
+        if conn in self._conns:
+            self._conns.remove(conn)
+
+    def _collect(self):
+        live = list(self._conns)
+        while live:
+            for conn in wait(live):
+                try:
+                    msg = conn.recv()
+                except EOFError:
+                    msg = None
+                    with self._lock:
+                        self._retire(conn)
+                        lost = self._outstanding[conn]
+                        self._outstanding[conn] = {}
+                    for fut in lost.values():
+                        fut.set_exception(
+                            RuntimeError("pipe worker exited unexpectedly"))
+                if msg is None:
+                    live.remove(conn)
+                    continue
+                task_id, ok, value = msg
+                with self._lock:
+                    fut = self._outstanding[conn].pop(task_id)
+                if ok:
+                    fut.set_result(value)
+                else:
+                    fut.set_exception(value)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                with self._send_locks[conn]:
+                    conn.send(None)
+            except OSError:
+                pass  # Worker already gone
+        if wait:
+            self._collector.join()
+            for process in self._processes:
+                process.join()
+
+
+BACKENDS = {
+    'inline': InlineExecutor,
+    'thread': ThreadExecutor,
+    'process': ProcessExecutor,
+    'pool': PoolExecutor,
+    'pipe': PipeExecutor,
+}
+
+
+def get_executor(backend="pool", workers=None, context=None,
+                 initializer=None, initargs=(), **options):
+    """
+    Creates an executor for do_something tasks.
+
+    Call sites only use submit/map/shutdown, so the backend can be chosen
+    per deployment without touching them.
+
+    Args:
+        backend (str): One of BACKENDS: inline, thread, process, pool, pipe
+        workers (int): Number of workers (default: CPU count)
+        context: multiprocessing context for the process-based backends
+        initializer: Called with 'initargs' once in every worker process
+            or thread, e.g. to pin it to a CPU (see cpu_placement.py)
+        initargs (tuple): Arguments of 'initializer'
+        **options: Backend specific, e.g. chunksize (pool) or cpus
+            (process)
+
+    Returns:
+        TaskExecutor: The executor; use it as a context manager
+    """
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown backend: {backend!r}") from None
+    return cls(workers, context, initializer, initargs, **options)
+
+
+if __name__ == "__main__":
+    sizes = [1000, 2000, 3000, 4000]
+    for backend in BACKENDS:
+        with get_executor(backend, workers=2) as executor:
+            records = executor.map(sizes)
+        print(f"[{backend}] prime counts: "
+              f"{[r['prime_count'] for r in records]}")
@@ -0,0 +1,148 @@
+# adaptive_limiter.py
+import os
+import threading
+import time
+from collections import deque
+
+
+class AdaptiveSemaphore:
+    """
+    Semaphore whose number of permits tunes itself at runtime.
+
+    It has the acquire()/release() interface of threading.Semaphore. The
+    time between a thread's acquire() and release() is taken as the task
+    latency. After every 'window' releases the limiter compares the
+    window's mean latency and throughput with what it has seen before and
+    applies AIMD:
+
+    - latency above 'tolerance' times the best latency seen: the work is
+      queuing behind itself, so multiply the limit by 'backoff'
+    - throughput fell (by more than 5%) after the last increase: past the
+      knee, step back 1
+    - otherwise, if the limit was actually reached during the window,
+      add 1 permit
+
+    Every change is appended to 'decisions' for inspection.
+
+    Args:
+        initial (int): Starting number of permits
+        min_limit (int): Lower bound of the limit
+        max_limit (int): Upper bound of the limit (default: 4 x CPU count)
+        window (int): Releases per adjustment
+        tolerance (float): Allowed latency growth over the best window
+        backoff (float): Multiplicative decrease factor
+        history (int): Number of decisions kept
+    """
+
+    def __init__(self, initial=2, min_limit=1, max_limit=None, window=8,
+                 tolerance=1.5, backoff=0.7, history=100):
+        self.min_limit = min_limit
+        self.max_limit = max_limit or 4 * (os.cpu_count() or 1)
+        self.window = window
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.decisions = deque(maxlen=history)
+        self._limit = max(min_limit, min(initial, self.max_limit))
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._started = {}  # thread id -> acquire time
+        # Current window
+        self._latencies = []
+        self._window_start = time.perf_counter()
+        self._saturated = False
+        # History
+        self._best_latency = None
+        self._last_throughput = None
+        self._last_action = None
+
+    @property
+    def limit(self):
+        """The current number of permits."""
+        return self._limit
+
+    @property
+    def in_use(self):
+        """The number of permits currently held."""
+        return self._in_use
+
+    def acquire(self, blocking=True, timeout=None):
+        """
+        Acquires a permit, like threading.Semaphore.acquire().
+
+        Returns:
+            bool: True if a permit was acquired
+        """
+        with self._cond:
+            if self._in_use >= self._limit:
+                self._saturated = True
+                if not blocking:
+                    return False
+                if not self._cond.wait_for(
+                        lambda: self._in_use < self._limit, timeout):
+                    return False
+            self._in_use += 1
+            if self._in_use >= self._limit:
+                self._saturated = True
+            self._started[threading.get_ident()] = time.perf_counter()
+            return True
+
+    def release(self):
+        """Releases a permit and feeds the task latency to the limiter."""
+        now = time.perf_counter()
+        with self._cond:
+            started = self._started.pop(threading.get_ident(), None)
+            self._in_use -= 1
+            if started is not None:
+                self._latencies.append(now - started)
+                if len(self._latencies) >= self.window:
+                    self._adjust(now)
+            self._cond.notify_all()
+
+    def _adjust(self, now):
+        """Applies one AIMD step at the end of a window (lock held)."""
+        latency = sum(self._latencies) / len(self._latencies)
+        throughput = len(self._latencies) / max(now - self._window_start,
+                                                1e-9)
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+
+        old = self._limit
+        if latency > self._best_latency * self.tolerance:
+            new, reason = int(old * self.backoff), "latency"
+        elif (self._last_action == "increase"
+              and throughput < self._last_throughput * 0.95):
+            new, reason = old - 1, "throughput"
+        elif self._saturated:
+            new, reason = old + 1, "headroom"
+        else:
+            new, reason = old, "idle"
+        new = max(self.min_limit, min(new, self.max_limit))
+
+        if new != old:
+            self._limit = new
+            self._last_action = "increase" if new > old else "decrease"
+            self.decisions.append({
+                'time': time.time(),
+                'old_limit': old,
+                'new_limit': new,
+                'reason': reason,
+                'latency': latency,
+                'throughput': throughput
+            })
+            # Let the best latency drift up after a decrease, so a single
+            # unusually fast window cannot pin the limit low for good
+            if new < old:
+                self._best_latency *= 1.1
+        else:
+            self._last_action = None
+        self._last_throughput = throughput
+        self._latencies = []
+        self._window_start = now
+        self._saturated = False
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
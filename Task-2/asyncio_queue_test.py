@@ -0,0 +1,161 @@
+# asyncio_queue_test.py
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from do_something import do_something, is_quiet
+
+NUM_CONSUMERS = 3
+
+
+def compute(count):
+    """
+    Runs do_something in a worker process and returns its result record.
+    """
+    out_list = []
+    do_something(count, out_list)
+    return out_list[0]
+
+
+async def producer(q, tasks):
+    """
+    Async producer.
+
+    Enqueues (task_id, count) pairs. put() blocks while the bounded queue
+    is full, so the producer can never run ahead of the consumers by more
+    than the queue size.
+    """
+    for task_id, count in enumerate(tasks):
+        await q.put((task_id, count))
+        if not is_quiet():
+            print(f"[AsyncQueue] Producer enqueued task {task_id}")
+
+
+async def consumer(cid, q, executor, in_flight, results, errors):
+    """
+    Async consumer.
+
+    Takes tasks from the queue and offloads do_something to the process
+    pool without waiting for each one to finish, so one consumer can keep
+    several tasks computing. 'in_flight' caps how many tasks are computing
+    at once across all consumers. A failing task is recorded in 'errors'
+    and the consumer keeps going. Runs until cancelled; cancelling it also
+    cancels the tasks it started.
+    """
+    loop = asyncio.get_running_loop()
+    jobs = set()
+
+    async def run(task_id, count):
+        start_time = time.perf_counter()
+        try:
+            res = await loop.run_in_executor(executor, compute, count)
+        except Exception as exc:
+            duration = time.perf_counter() - start_time
+            errors.append((cid, task_id, exc, duration))
+            if not is_quiet():
+                print(f"[AsyncQueue] Consumer {cid} task {task_id} "
+                      f"failed: {exc!r}")
+        else:
+            duration = time.perf_counter() - start_time
+            results.append((cid, task_id, res, duration))
+            if not is_quiet():
+                print(f"[AsyncQueue] Consumer {cid} processed task {task_id} "
+                      f"| Prime count={res['prime_count']}, "
+                      f"Time={duration:.3f}s")
+        finally:
+            in_flight.release()
+            q.task_done()
+
+    try:
+        while True:
+            task_id, count = await q.get()
+            try:
+                await in_flight.acquire()
+            except BaseException:
+                q.task_done()
+                raise
+            job = asyncio.create_task(run(task_id, count))
+            jobs.add(job)
+            job.add_done_callback(jobs.discard)
+    finally:
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+
+async def run_pipeline(tasks, num_consumers=NUM_CONSUMERS, queue_size=4,
+                       max_in_flight=None, processes=None, timeout=None,
+                       return_exceptions=False):
+    """
+    Runs an asyncio producer/consumer pipeline over a process pool.
+
+    Memory stays bounded: at most 'queue_size' tasks wait in the queue
+    and at most 'max_in_flight' are being computed. On normal completion
+    the queue is drained (every task processed) before the consumers are
+    cancelled. If 'timeout' expires or the caller cancels run_pipeline,
+    the producer and consumers are cancelled, queued tasks are dropped
+    and the pool is shut down without waiting for pending work. A failing
+    task does not stop the pipeline; like asyncio.gather, the first
+    failure is raised once the queue has drained, unless
+    'return_exceptions' is set.
+
+    Args:
+        tasks (list): Workload size of each task
+        num_consumers (int): Number of consumer coroutines
+        queue_size (int): Capacity of the task queue
+        max_in_flight (int): Concurrent computations (default: consumers)
+        processes (int): Worker processes (default: CPU count)
+        timeout (float): Optional deadline for the whole run in seconds
+        return_exceptions (bool): Return failed tasks with the exception in
+            place of the result record instead of raising
+
+    Returns:
+        list: (consumer id, task id, result record, duration) tuples for
+        every task that completed (and failed, with return_exceptions)
+
+    Raises:
+        asyncio.TimeoutError: If 'timeout' expired before the drain
+        Exception: The first task failure, without return_exceptions
+    """
+    q = asyncio.Queue(maxsize=queue_size)
+    in_flight = asyncio.Semaphore(max_in_flight or num_consumers)
+    results = []
+    errors = []
+    executor = ProcessPoolExecutor(processes)
+    consumers = [asyncio.create_task(consumer(i, q, executor, in_flight,
+                                              results, errors))
+                 for i in range(num_consumers)]
+    prod = asyncio.create_task(producer(q, tasks))
+
+    async def drain():
+        await prod
+        await q.join()  # Every queued task has been processed
+
+    drained = False
+    try:
+        await asyncio.wait_for(drain(), timeout)
+        drained = True
+    finally:
+        prod.cancel()
+        for c in consumers:
+            c.cancel()
+        await asyncio.gather(prod, *consumers, return_exceptions=True)
+        executor.shutdown(wait=drained, cancel_futures=not drained)
+    if return_exceptions:
+        return results + errors
+    if errors:
+        raise errors[0][2]
+    return results
+
+
+if __name__ == "__main__":
+    tasks = [2000] * 12
+    start = time.perf_counter()
+    results = asyncio.run(run_pipeline(tasks, queue_size=4, max_in_flight=2))
+    print(f"\nAll async queue tasks processed: {len(results)} results in "
+          f"{time.perf_counter() - start:.3f}s")
+    for r in sorted(results, key=lambda r: r[1]):
+        print(f" - Consumer {r[0]} → Task {r[1]} | "
+              f"Prime count={r[2]['prime_count']}, "
+              f"Largest prime={r[2]['largest_prime']}, "
+              f"Math result={r[2]['math_result']:.2f}, "
+              f"Time={r[3]:.3f}s")
@@ -0,0 +1,258 @@
+# bsp_engine.py
+import multiprocessing
+import queue
+import threading
+import time
+from array import array
+from multiprocessing import shared_memory
+from do_something import prime_range_summary
+
+# Timing columns recorded per superstep and worker
+PHASES = ("compute", "exchange", "barrier_wait")
+
+# Seconds between checks for dead workers while waiting for results
+POLL_INTERVAL = 0.1
+
+
+def _bsp_worker(rank, shm_name, workers, slot, supersteps, barrier, step_fn,
+                state, result_queue):
+    """
+    Worker process: runs every superstep of one rank.
+
+    The shared block holds two exchange buffers of workers x slot doubles
+    followed by the timing table. Superstep s reads the buffer written in
+    s - 1 and writes the other one, so one barrier per superstep is enough:
+    nobody can overwrite a buffer that somebody is still reading.
+
+    Posts (rank, True, final state), or (rank, False, exception) after
+    aborting the barrier, so the other ranks stop waiting for this one.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    data = shm.buf.cast("d")
+    exchange = 2 * workers * slot
+    inbox = None
+    try:
+        for step in range(supersteps):
+            read = ((step + 1) % 2) * workers * slot
+            write = (step % 2) * workers * slot + rank * slot
+            inbox = [data[read + r * slot:read + (r + 1) * slot]
+                     for r in range(workers)]
+
+            t0 = time.perf_counter()
+            state, outgoing = step_fn(rank, step, state, inbox)
+            t1 = time.perf_counter()
+            del inbox
+            out = array("d", outgoing)
+            if len(out) > slot:
+                raise ValueError(f"rank {rank} sent {len(out)} floats; "
+                                 f"the slot holds {slot}")
+            out.extend([0.0] * (slot - len(out)))  # No stale values
+            data[write:write + slot] = out
+            t2 = time.perf_counter()
+            barrier.wait()
+            t3 = time.perf_counter()
+
+            row = exchange + (step * workers + rank) * len(PHASES)
+            data[row:row + len(PHASES)] = array("d", (t1 - t0, t2 - t1,
+                                                      t3 - t2))
+        result_queue.put((rank, True, state))
+    except Exception as exc:
+        # Views into the block must go before it is closed: drop ours and
+        # the traceback's frames (the queue's feeder thread keeps 'exc')
+        inbox = None
+        exc = exc.with_traceback(None)
+        barrier.abort()
+        try:
+            result_queue.put((rank, False, exc))
+        except Exception:
+            result_queue.put((rank, False, RuntimeError(repr(exc))))
+    finally:
+        data.release()
+        shm.close()
+
+
+class BSPResult:
+    """
+    Final states and per-superstep timings of a BSP run.
+
+    'steps' has one dict per superstep with per-worker lists for each of
+    PHASES, the round time (slowest worker's compute + exchange + wait)
+    and the straggler (the rank with the longest compute).
+    """
+
+    def __init__(self, states, timings):
+        self.states = states
+        self.steps = []
+        for step, rows in enumerate(timings):
+            compute = [r[0] for r in rows]
+            exchange = [r[1] for r in rows]
+            wait = [r[2] for r in rows]
+            self.steps.append({
+                'step': step,
+                'compute': compute,
+                'exchange': exchange,
+                'barrier_wait': wait,
+                'round': max(sum(r) for r in rows),
+                'straggler': compute.index(max(compute))
+            })
+
+    def report(self):
+        """Formats the per-superstep timings as text."""
+        lines = []
+        for s in self.steps:
+            lines.append(
+                f"step {s['step']:>3}: round={s['round'] * 1000:8.3f}ms "
+                f"compute max={max(s['compute']) * 1000:8.3f}ms "
+                f"exchange max={max(s['exchange']) * 1000:6.3f}ms "
+                f"wait max={max(s['barrier_wait']) * 1000:8.3f}ms "
+                f"straggler=rank {s['straggler']}")
+        return "\n".join(lines)
+
+
+class BSPEngine:
+    """
+    Bulk-synchronous-parallel engine on worker processes.
+
+    Every superstep, each rank calls step_fn(rank, step, state, inbox) and
+    must return (new_state, outgoing). 'inbox' holds one read-only
+    sequence of 'slot' floats per rank: whatever that rank sent in the
+    previous superstep (zeros in superstep 0). 'outgoing' is at most
+    'slot' floats; the rest of the slot is zeroed. If step_fn raises in
+    any rank, the barrier is aborted and run() raises that exception.
+    The exchange buffers live in shared memory, so values
+    are never pickled, and ranks synchronize on one
+    multiprocessing.Barrier per superstep.
+
+    step_fn must be a module-level function so every start method can
+    send it to the workers. It must not keep 'inbox' after it returns.
+
+    Args:
+        workers (int): Number of ranks (worker processes)
+        slot (int): Floats each rank can send per superstep
+        context: multiprocessing context
+    """
+
+    def __init__(self, workers, slot=1, context=None):
+        self.workers = workers
+        self.slot = slot
+        self.ctx = context or multiprocessing.get_context()
+
+    def run(self, step_fn, supersteps, states=None):
+        """
+        Runs 'supersteps' supersteps.
+
+        Args:
+            step_fn: The superstep function (see class docstring)
+            supersteps (int): Number of supersteps
+            states (list): Initial state per rank (default: None)
+
+        Returns:
+            BSPResult: Final states by rank and per-step timings
+
+        Raises:
+            Exception: What step_fn raised in the first failing rank
+            RuntimeError: If a worker process died
+        """
+        workers, slot = self.workers, self.slot
+        states = states or [None] * workers
+        doubles = 2 * workers * slot + supersteps * workers * len(PHASES)
+        shm = shared_memory.SharedMemory(create=True, size=max(doubles, 1) * 8)
+        try:
+            shm.buf[:doubles * 8] = bytes(doubles * 8)
+            barrier = self.ctx.Barrier(workers)
+            result_queue = self.ctx.Queue()
+            processes = [
+                self.ctx.Process(target=_bsp_worker,
+                                 args=(rank, shm.name, workers, slot,
+                                       supersteps, barrier, step_fn,
+                                       states[rank], result_queue))
+                for rank in range(workers)]
+            for p in processes:
+                p.start()
+            final = self._collect(processes, barrier, result_queue)
+
+            data = shm.buf.cast("d")
+            base = 2 * workers * slot
+            timings = [[tuple(data[base + (s * workers + r) * len(PHASES):
+                                   base + (s * workers + r + 1) * len(PHASES)])
+                        for r in range(workers)]
+                       for s in range(supersteps)]
+            data.release()
+        finally:
+            shm.close()
+            shm.unlink()
+        return BSPResult(final, timings)
+
+    @staticmethod
+    def _collect(processes, barrier, result_queue):
+        """
+        Gathers every rank's final state, or raises the first failure.
+
+        A worker that dies without reporting (killed, os._exit) is found
+        through its exit code; the barrier is then aborted so the other
+        ranks stop waiting for it.
+        """
+        workers = len(processes)
+        final = [None] * workers
+        reported = set()
+        errors = []
+        while len(reported) < workers:
+            try:
+                rank, ok, value = result_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                for rank, p in enumerate(processes):
+                    if rank not in reported and p.exitcode not in (None, 0):
+                        barrier.abort()
+                        reported.add(rank)
+                        errors.append(RuntimeError(
+                            f"BSP rank {rank} exited with code {p.exitcode}"))
+                continue
+            reported.add(rank)
+            if ok:
+                final[rank] = value
+            else:
+                errors.append(value)
+        for p in processes:
+            p.join()
+        if errors:
+            # Ranks that only saw the aborted barrier are not the cause
+            causes = [e for e in errors
+                      if not isinstance(e, threading.BrokenBarrierError)]
+            raise (causes or errors)[0]
+        return final
+
+
+BLOCK = 200_000
+
+
+def count_primes_step(rank, step, state, inbox):
+    """
+    Example superstep: a distributed running prime count.
+
+    The state is (blocks, total, largest). In superstep s < blocks the
+    ranks split [s * BLOCK, (s + 1) * BLOCK) between them, count their
+    share, and publish (count, largest). Each rank folds the previous
+    superstep's messages into its running total, so after blocks + 1
+    supersteps every rank knows the global answer.
+    """
+    blocks, total, largest = state
+    for count, big in inbox:
+        total += int(count)
+        largest = max(largest, int(big))
+    if step >= blocks:
+        return (blocks, total, largest), (0, 0)
+    workers = len(inbox)
+    lo = step * BLOCK + rank * BLOCK // workers
+    hi = step * BLOCK + (rank + 1) * BLOCK // workers
+    count, big = prime_range_summary(lo, hi)
+    return (blocks, total, largest), (count, big or 0)
+
+
+if __name__ == "__main__":
+    blocks, workers = 10, 4
+    engine = BSPEngine(workers, slot=2)
+    result = engine.run(count_primes_step, blocks + 1,
+                        [(blocks, 0, 0)] * workers)
+    print(result.report())
+    _, total, largest = result.states[0]
+    print(f"\nPrimes below {blocks * BLOCK}: {total} (largest {largest})")
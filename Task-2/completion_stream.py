@@ -0,0 +1,201 @@
+# completion_stream.py
+import threading
+import time
+from collections import deque
+
+
+class Reducer:
+    """
+    Folds do_something result records into one value, one at a time.
+
+    Subclasses keep O(1) state, so memory does not grow with the number of
+    tasks. 'name' is the key used in CompletionStream.aggregates().
+    """
+    name = "reducer"
+
+    def add(self, record):
+        raise NotImplementedError
+
+    @property
+    def value(self):
+        raise NotImplementedError
+
+
+class PrimeTotal(Reducer):
+    """Running total of 'prime_count'."""
+    name = "prime_total"
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, record):
+        self.total += record['prime_count']
+
+    @property
+    def value(self):
+        return self.total
+
+
+class MaxLargestPrime(Reducer):
+    """Largest 'largest_prime' seen so far (None until one is seen)."""
+    name = "largest_prime"
+
+    def __init__(self):
+        self.largest = None
+
+    def add(self, record):
+        largest = record['largest_prime']
+        if largest is not None and (self.largest is None
+                                    or largest > self.largest):
+            self.largest = largest
+
+    @property
+    def value(self):
+        return self.largest
+
+
+class MathSum(Reducer):
+    """
+    Sum of 'math_result' with Neumaier compensation.
+
+    The running compensation keeps the error of a long sum at about one
+    rounding, whatever order the results complete in, without storing the
+    terms as math.fsum would.
+    """
+    name = "math_sum"
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, record):
+        x = record['math_result']
+        t = self.total + x
+        if abs(self.total) >= abs(x):
+            self.compensation += (self.total - t) + x
+        else:
+            self.compensation += (x - t) + self.total
+        self.total = t
+
+    @property
+    def value(self):
+        return self.total + self.compensation
+
+
+DEFAULT_REDUCERS = (PrimeTotal, MaxLargestPrime, MathSum)
+
+
+class CompletionStream:
+    """
+    Yields futures as they complete and folds their results on the way.
+
+    Futures register a done-callback that pushes them onto a short deque
+    under a Condition, so the consumer wakes up exactly when a result is
+    ready instead of polling. Completed futures are dropped once yielded:
+    the stream holds only futures that are done but not yet consumed, and
+    the reducers hold O(1) state each.
+
+    Futures can be added while iterating. Iteration ends when every added
+    future has been yielded.
+
+    Args:
+        futures: Initial futures (more can be added with add())
+        reducers (list): Reducer instances (default: one of each in
+            DEFAULT_REDUCERS)
+        key: Function mapping a future's result to a record
+            (default: the result itself)
+    """
+
+    def __init__(self, futures=(), reducers=None, key=None):
+        if reducers is None:
+            reducers = [cls() for cls in DEFAULT_REDUCERS]
+        self.reducers = list(reducers)
+        self.key = key
+        self.count = 0   # Futures folded into the reducers
+        self.errors = 0  # Futures that raised or were cancelled
+        self._cond = threading.Condition()
+        self._done = deque()
+        self._pending = 0
+        for future in futures:
+            self.add(future)
+
+    def add(self, future):
+        """Adds a future to the stream."""
+        with self._cond:
+            self._pending += 1
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        with self._cond:
+            self._done.append(future)
+            self._cond.notify()
+
+    def as_completed(self, timeout=None):
+        """
+        Yields futures in completion order.
+
+        By the time a future is yielded its result has been folded into
+        the reducers, so aggregates() already includes it.
+
+        Args:
+            timeout (float): Maximum wait for the whole iteration
+
+        Raises:
+            TimeoutError: If 'timeout' expires with futures still pending
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._done:
+                    if self._pending == 0:
+                        return
+                    remaining = (None if deadline is None
+                                 else deadline - time.monotonic())
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(
+                            f"{self._pending} futures still pending")
+                    self._cond.wait(remaining)
+                future = self._done.popleft()
+                self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.errors += 1
+            else:
+                result = future.result()
+                record = result if self.key is None else self.key(result)
+                for reducer in self.reducers:
+                    reducer.add(record)
+                self.count += 1
+            yield future
+
+    def __iter__(self):
+        return self.as_completed()
+
+    def aggregates(self):
+        """
+        Returns the current partial aggregates.
+
+        Returns:
+            dict: 'completed', 'errors' and one entry per reducer name
+        """
+        values = {'completed': self.count, 'errors': self.errors}
+        for reducer in self.reducers:
+            values[reducer.name] = reducer.value
+        return values
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+    from do_something import do_something, set_quiet
+
+    def compute(count):
+        out_list = []
+        do_something(count, out_list)
+        return out_list[0]
+
+    set_quiet()
+    with ThreadPoolExecutor(4) as executor:
+        stream = CompletionStream()
+        for count in [200_000, 5_000, 50_000, 1_000, 100_000]:
+            stream.add(executor.submit(compute, count))
+        for future in stream:
+            print(f"[Stream] {stream.aggregates()}")
@@ -1,52 +1,60 @@
 # condition_test.py
 import threading
 import time
+from concurrent.futures import Future
+from completion_stream import CompletionStream
 from do_something import do_something
 
-cond = threading.Condition()
-results = []
 TARGET = 4
 
-def worker(id, count):
+def worker(id, count, future):
     """
     Worker thread function.
 
-    Performs computation using 'do_something', appends the result to
-    the shared list, and notifies the controller when done.
+    Performs computation using 'do_something' and completes its future.
+    Completing the future notifies the stream's Condition, which wakes the
+    controller.
     """
     out_list = []
-    val = do_something(count, out_list)
-    with cond:
-        results.append((id, out_list[0]))
-        print(f"[Condition] Worker {id} appended result ({len(results)}/{TARGET})")
-        cond.notify_all()  # Notify waiting controller thread(s)
+    try:
+        do_something(count, out_list)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result((id, out_list[0]))
 
-def controller():
+def controller(stream):
     """
     Controller thread function.
 
-    Waits until all worker threads complete their tasks and results
-    are available in the shared list.
+    Processes each result as soon as its worker finishes and shows the
+    running aggregates. Nothing is collected, so memory does not grow
+    with the number of workers.
     """
-    with cond:
-        while len(results) < TARGET:
-            print(f"[Condition] Controller waiting, have {len(results)}/{TARGET}")
-            cond.wait(timeout=5)  # Wait until notified or timeout
-        print("[Condition] Controller: target reached, processing results:")
-        for r in results:
-            print(f" - Worker {r[0]} → Prime count: {r[1]['prime_count']}, "
-                  f"Largest prime: {r[1]['largest_prime']}, "
-                  f"Math result: {r[1]['math_result']:.2f}")
+    for future in stream:
+        id, record = future.result()
+        totals = stream.aggregates()
+        print(f"[Condition] Controller got worker {id} "
+              f"({totals['completed']}/{TARGET}) → "
+              f"Prime count: {record['prime_count']}, "
+              f"Largest prime: {record['largest_prime']}, "
+              f"Math result: {record['math_result']:.2f}")
+        print(f"[Condition] Running totals → Primes: {totals['prime_total']}, "
+              f"Largest prime: {totals['largest_prime']}, "
+              f"Math sum: {totals['math_sum']:.2f}")
 
 if __name__ == "__main__":
+    futures = [Future() for _ in range(TARGET)]
+    stream = CompletionStream(futures, key=lambda result: result[1])
+
     # Start controller thread
-    ctrl = threading.Thread(target=controller)
+    ctrl = threading.Thread(target=controller, args=(stream,))
     ctrl.start()
 
     # Start worker threads
     threads = []
     for i in range(TARGET):
-        t = threading.Thread(target=worker, args=(i, 2))
+        t = threading.Thread(target=worker, args=(i, 2, futures[i]))
         threads.append(t)
         t.start()
         time.sleep(0.5)  # Slight delay to stagger workers
@@ -1,45 +1,614 @@
+import itertools
+import json
 import math
+import os
+import time
 
-def do_something(size, out_list):
+# NumPy is optional and imported lazily by _numpy(), so processes that only
+# run small tasks never pay for the import. None means "not tried yet",
+# False means "not installed".
+np = None
+
+# Width of one accumulation-stage chunk. Chunks always start on a multiple
+# of MATH_CHUNK, so the NumPy backend never holds more than this many
+# elements at once however large 'size' is.
+MATH_CHUNK = 1 << 16
+
+# Set DO_SOMETHING_QUIET=1 to skip the per-call summary line. It is read
+# from the environment so that worker processes inherit the setting.
+QUIET = os.environ.get("DO_SOMETHING_QUIET", "") not in ("", "0")
+
+# Odd numbers sieved at a time by prime_range_summary (256 KiB of flags)
+SIEVE_SEGMENT = 1 << 18
+
+# In "auto" mode, chunks shorter than this are summed in pure Python: for
+# them the NumPy call overhead (and the first-time import) costs more than
+# it saves.
+NUMPY_MIN_CHUNK = 2048
+
+# Relative tolerance between math_result from the NumPy backend and the
+# original one-float-at-a-time loop. Chunk sums are pairwise (np.sum) and
+# chunks are combined with math.fsum, so almost all of the difference is
+# rounding error accumulated by the scalar loop itself (about 1e-13 at
+# size=10**7).
+MATH_RTOL = 1e-10
+
+# Minimum number of seconds between two writes of a checkpoint file
+CHECKPOINT_INTERVAL = 1.0
+
+# Stages reported to a progress object (see checkpointed_summary)
+STAGE_SIEVE, STAGE_MATH, STAGE_DONE = 1, 2, 3
+
+
+def odd_sieve(limit):
+    """
+    Sieve of Eratosthenes over the odd numbers below 'limit'.
+
+    Only odd numbers are stored (the mod-2 wheel), so flags[j] describes
+    the number 2*j + 1 and the table takes limit // 2 bytes. Even numbers
+    are never touched, and each prime p crosses off only its odd multiples
+    starting at p*p (a stride of 2p in numbers, p in table indices).
+
+    Args:
+        limit (int): Exclusive upper bound of the sieve
+
+    Returns:
+        bytearray: flags[j] == 1 when 2*j + 1 is prime
+    """
+    n = limit // 2
+    flags = bytearray(b"\x01") * n
+    if n:
+        flags[0] = 0  # 1 is not prime
+    for j in range(1, (math.isqrt(limit - 1) + 1) // 2 if limit > 1 else 0):
+        if flags[j]:
+            p = 2 * j + 1
+            start = p * p // 2
+            flags[start::p] = bytes(len(range(start, n, p)))
+    return flags
+
+
+def sieve_segment(jlo, jhi, base_primes):
+    """
+    Sieves one segment of the odd-only table used by odd_sieve.
+
+    The segment covers table indices [jlo, jhi), i.e. the odd numbers
+    2*jlo + 1 up to 2*jhi - 1, and is built independently of every other
+    segment, so segments can be sieved in any order or in parallel.
+
+    Args:
+        jlo (int): First table index of the segment
+        jhi (int): Exclusive last table index of the segment
+        base_primes (list): The odd primes up to sqrt(2*jhi - 1), in
+            increasing order (extra larger primes are ignored)
+
+    Returns:
+        bytearray: flags[k] == 1 when 2*(jlo + k) + 1 is prime
+    """
+    n = jhi - jlo
+    flags = bytearray(b"\x01") * n
+    if jlo == 0 and n > 0:
+        flags[0] = 0  # 1 is not prime
+    first = 2 * jlo + 1
+    for p in base_primes:
+        m = p * p
+        if m > 2 * jhi - 1:
+            break
+        if m < first:
+            # First odd multiple of p inside the segment
+            m = -(-first // p) * p
+            if m % 2 == 0:
+                m += p
+        start = (m - 1) // 2 - jlo
+        flags[start::p] = bytes(len(range(start, n, p)))
+    return flags
+
+
+def prime_summary(size):
+    """
+    Counts the primes in [2, size) without building a list of them.
+
+    Args:
+        size (int): Exclusive upper bound
+
+    Returns:
+        tuple: (prime_count, largest_prime), largest_prime is None if
+        there are no primes below 'size'
+    """
+    if size <= 2:
+        return 0, None
+    flags = odd_sieve(size)
+    j = flags.rfind(1)
+    return flags.count(1) + 1, 2 * j + 1 if j > 0 else 2
+
+
+def prime_range_summary(lo, hi, base_primes=None):
+    """
+    Counts the primes in [lo, hi) with a segmented sieve.
+
+    Only the odd numbers in the range are sieved, SIEVE_SEGMENT at a time,
+    so memory stays bounded however wide the range is and the numbers
+    below 'lo' are never sieved.
+
+    Args:
+        lo (int): Inclusive lower bound
+        hi (int): Exclusive upper bound
+        base_primes (list): The odd primes up to sqrt(hi - 1); computed
+            when omitted
+
+    Returns:
+        tuple: (prime_count, largest_prime), largest_prime is None if
+        there are no primes in the range
+    """
+    lo = max(lo, 0)
+    if hi <= lo:
+        return 0, None
+    if base_primes is None:
+        base_primes = primes_below(math.isqrt(max(hi - 1, 0)) + 1)[1:]
+    count, largest = 0, None
+    if lo <= 2 < hi:
+        count, largest = 1, 2
+    jstop = hi // 2
+    for jlo in range(lo // 2, jstop, SIEVE_SEGMENT):
+        jhi = min(jlo + SIEVE_SEGMENT, jstop)
+        flags = sieve_segment(jlo, jhi, base_primes)
+        count += flags.count(1)
+        j = flags.rfind(1)
+        if j >= 0:
+            largest = 2 * (jlo + j) + 1
+    return count, largest
+
+
+def primes_below(size):
+    """
+    Lists the primes in [2, size) in increasing order.
+
+    Args:
+        size (int): Exclusive upper bound
+
+    Returns:
+        list: The primes below 'size'
+    """
+    if size <= 2:
+        return []
+    flags = odd_sieve(size)
+    return [2] + [2 * j + 1 for j in range(1, len(flags)) if flags[j]]
+
+
+def prime_blocks(start=0, stop=None, segment=SIEVE_SEGMENT):
+    """
+    Yields the primes in [start, stop) block by block.
+
+    Each block comes from one segment of the odd-only sieve, so working
+    memory is one segment of flags, the block itself and the base primes
+    up to sqrt(stop), however long the range is. With stop=None the
+    stream never ends; the base primes are extended as it goes.
+
+    Every block is yielded together with the number where it ends, so a
+    stream can be resumed exactly: prime_blocks(end, stop) continues with
+    the next block.
+
+    Args:
+        start (int): Inclusive lower bound
+        stop (int): Exclusive upper bound (default: no bound)
+        segment (int): Odd numbers sieved per block
+
+    Yields:
+        tuple: (end, primes) where 'primes' lists the primes below 'end'
+        not yielded before, in increasing order
+    """
+    lo = max(start, 0)
+    if stop is not None and stop <= lo:
+        return
+    jlo = lo // 2
+    jstop = None if stop is None else stop // 2
+    two = lo <= 2 and (stop is None or stop > 2)  # Goes in the first block
+    base_primes, base_limit = [], 0
+    while jstop is None or jlo < jstop or two:
+        jhi = jlo + segment if jstop is None else min(jlo + segment, jstop)
+        needed = math.isqrt(2 * jhi) + 1
+        if needed > base_limit:
+            base_limit = max(needed, 2 * base_limit)
+            base_primes = primes_below(base_limit)[1:]
+        flags = sieve_segment(jlo, jhi, base_primes)
+        primes = list(itertools.compress(range(2 * jlo + 1, 2 * jhi, 2),
+                                         flags))
+        if two:
+            primes.insert(0, 2)
+            two = False
+        end = 2 * jhi if jstop is None or jhi < jstop else stop
+        yield end, primes
+        jlo = jhi
+
+
+def iter_primes(start=0, stop=None):
+    """
+    Yields the primes in [start, stop) one at a time, in increasing order.
+
+    A stream stopped after yielding p resumes with iter_primes(p + 1, stop).
+    See prime_blocks for the memory bound.
+    """
+    for _, primes in prime_blocks(start, stop):
+        yield from primes
+
+
+def summarize_primes(blocks):
+    """
+    Folds a stream of prime_blocks into (prime_count, largest_prime).
+
+    Args:
+        blocks: An iterable of (end, primes) blocks as from prime_blocks
+
+    Returns:
+        tuple: (prime_count, largest_prime), largest_prime is None if
+        the stream held no primes
+    """
+    prime_count, largest_prime = 0, None
+    for _, primes in blocks:
+        prime_count += len(primes)
+        if primes:
+            largest_prime = primes[-1]
+    return prime_count, largest_prime
+
+
+def _math_chunk_python(lo, hi):
+    """Accumulation stage over [lo, hi), one Python float at a time."""
+    result = 0.0
+    for i in range(lo, hi):
+        result += math.sqrt(i + 1)
+        result += math.sin(i) * math.cos(i)
+        result += math.log(i + 1)
+    return result
+
+
+def _numpy():
+    """Imports NumPy on first use; returns None when it is not installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            np = False
+        else:
+            np = numpy
+    return np or None
+
+
+def _math_chunk_numpy(lo, hi):
+    """Accumulation stage over [lo, hi), vectorized with NumPy."""
+    np = _numpy()
+    i = np.arange(lo, hi, dtype=np.float64)
+    terms = np.sqrt(i + 1)
+    terms += np.sin(i) * np.cos(i)
+    terms += np.log(i + 1)
+    return float(terms.sum())  # pairwise summation
+
+
+def _math_chunk_auto(lo, hi):
+    """Accumulation stage over [lo, hi), with NumPy when it pays off."""
+    if hi - lo >= NUMPY_MIN_CHUNK and _numpy() is not None:
+        return _math_chunk_numpy(lo, hi)
+    return _math_chunk_python(lo, hi)
+
+
+def _math_backend(backend):
+    if backend == "auto":
+        return _math_chunk_auto
+    if backend == "numpy":
+        if _numpy() is None:
+            raise ImportError("math backend 'numpy' requires NumPy")
+        return _math_chunk_numpy
+    if backend == "python":
+        return _math_chunk_python
+    raise ValueError(f"unknown math backend: {backend!r}")
+
+
+def _resolved_backend(backend):
+    # "auto" without NumPy computes exactly what "python" does
+    if backend == "auto" and _numpy() is None:
+        return "python"
+    return backend
+
+
+def math_partials(start, stop, backend="auto", chunk_size=MATH_CHUNK):
+    """
+    Yields the accumulation-stage sum of each chunk of [start, stop).
+
+    Chunk boundaries fall on multiples of 'chunk_size', so the partial
+    sums of a range depend only on the range and never on how the caller
+    walks it.
+
+    Args:
+        start (int): First index of the range
+        stop (int): Exclusive end of the range
+        backend (str): "numpy", "python" or "auto" (NumPy when installed,
+            for chunks of at least NUMPY_MIN_CHUNK values)
+        chunk_size (int): Width of one chunk
+
+    Yields:
+        float: The sum of sqrt(i+1) + sin(i)*cos(i) + log(i+1) over a chunk
+    """
+    chunk = _math_backend(backend)
+    lo = start
+    while lo < stop:
+        hi = min((lo // chunk_size + 1) * chunk_size, stop)
+        yield chunk(lo, hi)
+        lo = hi
+
+
+def math_stage(size, backend="auto", chunk_size=MATH_CHUNK):
+    """
+    Computes the accumulation stage of do_something for i in [0, size).
+
+    The chunk sums are combined with math.fsum (compensated summation),
+    so the result matches the scalar loop to within MATH_RTOL.
+
+    Args:
+        size (int): Number of terms
+        backend (str): "numpy", "python" or "auto" (NumPy when installed)
+        chunk_size (int): Width of one chunk
+
+    Returns:
+        float: The accumulated math result
+    """
+    return math.fsum(math_partials(0, size, backend, chunk_size))
+
+
+class Checkpoint:
+    """
+    Progress of one checkpointed do_something call, kept in a JSON file.
+
+    The state holds the sieve position, the prime count and largest prime
+    so far, the math position with the chunk sums so far, and the math
+    backend that computed them. Floats are stored with repr precision, so
+    a resumed run gives exactly the result of an uninterrupted one; the
+    backends round differently, so a state saved by another backend is
+    discarded instead of mixed in. Writes go to a temporary file that
+    replaces the state file, so a kill during a write leaves the previous
+    checkpoint intact.
+
+    Args:
+        path (str): Path of the state file
+        interval (float): Minimum seconds between periodic writes
+    """
+
+    def __init__(self, path, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def load(self, size, math_backend="auto"):
+        """
+        Returns the saved state for 'size' and 'math_backend', or None if
+        there is none.
+        """
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(state, dict) or state.get('size') != size
+                or state.get('math_backend')
+                != _resolved_backend(math_backend)):
+            return None
+        return state
+
+    def save(self, state):
+        """Writes 'state' atomically."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+        self._last_save = time.monotonic()
+
+    def maybe_save(self, state):
+        """Writes 'state' if 'interval' has passed since the last write."""
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save(state)
+
+    def clear(self):
+        """Removes the state file once the task has finished."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpointed_summary(size, checkpoint=None, deadline=None,
+                         math_backend="auto", progress=None):
+    """
+    Runs both stages of do_something in small resumable steps.
+
+    The primes are counted one SIEVE_SEGMENT at a time and the math stage
+    advances one MATH_CHUNK-aligned chunk at a time, so the state between
+    two steps is a few numbers plus one float per math chunk. If a
+    checkpoint is given, the run starts from its saved state and saves
+    every checkpoint.interval seconds; it is removed when the run
+    finishes. The result is identical to an uninterrupted do_something
+    with the same math backend.
+
+    A progress object, if given, gets progress.begin(size) once and then
+    progress.update(num, primes, stage) after every step: the number the
+    current stage has reached, the primes found so far and STAGE_SIEVE,
+    STAGE_MATH or STAGE_DONE. Steps take milliseconds, so this costs
+    nothing measurable.
+
+    Args:
+        size (int): The range up to which to perform computations
+        checkpoint (Checkpoint): Where progress is saved (default: none)
+        deadline (float): time.time() at which to stop early
+        math_backend (str): "numpy", "python" or "auto"
+        progress: Receives begin() and update() calls (default: none)
+
+    Returns:
+        tuple: (record, finished). When the deadline stopped the run,
+        'finished' is False and the record holds the partial results with
+        'partial': True; the state has been saved to the checkpoint.
+    """
+    chunk = _math_backend(math_backend)
+    state = checkpoint.load(size, math_backend) if checkpoint else None
+    if state is None:
+        state = {
+            'size': size,
+            'math_backend': _resolved_backend(math_backend),
+            'sieve_pos': 0,
+            'prime_count': 0,
+            'largest_prime': None,
+            'math_pos': 0,
+            'chunk_sums': []
+        }
+    jstop = size // 2
+    base_primes = None
+    finished = False
+    if progress is not None:
+        progress.begin(size)
+    while True:
+        if state['sieve_pos'] < jstop:
+            if base_primes is None:
+                base_primes = primes_below(math.isqrt(size - 1) + 1)[1:]
+            jlo = state['sieve_pos']
+            jhi = min(jlo + SIEVE_SEGMENT, jstop)
+            flags = sieve_segment(jlo, jhi, base_primes)
+            state['prime_count'] += flags.count(1)
+            j = flags.rfind(1)
+            if j >= 0:
+                state['largest_prime'] = 2 * (jlo + j) + 1
+            state['sieve_pos'] = jhi
+        elif state['math_pos'] < size:
+            lo = state['math_pos']
+            hi = min((lo // MATH_CHUNK + 1) * MATH_CHUNK, size)
+            state['chunk_sums'].append(chunk(lo, hi))
+            state['math_pos'] = hi
+        else:
+            finished = True
+            break
+        if progress is not None:
+            if state['sieve_pos'] < jstop:
+                progress.update(2 * state['sieve_pos'],
+                                state['prime_count'], STAGE_SIEVE)
+            else:
+                progress.update(state['math_pos'], state['prime_count'],
+                                STAGE_MATH)
+        if deadline is not None and time.time() >= deadline:
+            break
+        if checkpoint:
+            checkpoint.maybe_save(state)
+
+    if checkpoint:
+        if finished:
+            checkpoint.clear()
+        else:
+            checkpoint.save(state)
+
+    # The segments only cover odd numbers; add the prime 2
+    prime_count, largest_prime = state['prime_count'], state['largest_prime']
+    if size > 2:
+        prime_count += 1
+        largest_prime = largest_prime or 2
+    record = {
+        'prime_count': prime_count,
+        'math_result': math.fsum(state['chunk_sums']),
+        'largest_prime': largest_prime
+    }
+    if not finished:
+        record['partial'] = True
+    elif progress is not None:
+        progress.update(size, prime_count, STAGE_DONE)
+    return record, finished
+
+
+def set_quiet(quiet=True):
+    """
+    Turns the per-call summary line on or off for this process and for
+    worker processes started afterwards.
+
+    Args:
+        quiet (bool): True to stop printing
+    """
+    global QUIET
+    QUIET = bool(quiet)
+    os.environ["DO_SOMETHING_QUIET"] = "1" if quiet else "0"
+
+
+def is_quiet():
+    """Returns True when do_something should not print."""
+    return QUIET
+
+
+def print_result(record):
+    """
+    Prints the one-line summary of a do_something result record.
+
+    Args:
+        record (dict): A record as stored in out_list by do_something
+    """
+    largest_prime = record['largest_prime']
+    print(f"Process completed: Found {record['prime_count']} primes, "
+          f"Largest prime: {largest_prime if largest_prime else 'None'}, "
+          f"Math result: {record['math_result']:.2f}")
+
+
+def do_something(size, out_list, count_only=True, math_backend="auto",
+                 quiet=None, checkpoint=None, deadline=None, progress=None):
     """
     Performs CPU-intensive mathematical computations.
-    
+
     This function calculates prime numbers up to 'size' and performs
     various mathematical operations to simulate real computational work.
-    
+    Primes are found with an odd-only Sieve of Eratosthenes; by default
+    they are only counted, and with count_only=False they are streamed
+    block by block (prime_blocks), so no list of all primes is ever built.
+
     Args:
         size (int): The range up to which to perform computations
         out_list (list): Output list to store results
+        count_only (bool): Count the primes instead of listing them
+        math_backend (str): "numpy", "python" or "auto" for the
+            accumulation stage (see math_stage)
+        quiet (bool): Skip the summary line (default: is_quiet())
+        checkpoint (str): State file to resume from and save progress to
+            (a path or a Checkpoint; see checkpointed_summary)
+        deadline (float): time.time() at which to stop with a partial
+            result, flagged with 'partial': True
+        progress: Receives live progress (e.g. a progress_board slot;
+            see checkpointed_summary)
+
+    Raises:
+        ValueError: If checkpoint, deadline or progress is used with
+            count_only=False
     """
-    result = 0
-    primes = []
-    
+    if checkpoint is not None or deadline is not None or progress is not None:
+        if not count_only:
+            raise ValueError("checkpoints, deadlines and progress require "
+                             "count_only=True")
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        record, _ = checkpointed_summary(size, checkpoint, deadline,
+                                         math_backend, progress)
+        out_list.append(record)
+        if not (QUIET if quiet is None else quiet):
+            print_result(record)
+        return record['math_result']
+
     # Prime number calculation (CPU-intensive)
-    for num in range(2, size):
-        is_prime = True
-        for i in range(2, int(math.sqrt(num)) + 1):
-            if num % i == 0:
-                is_prime = False
-                break
-        if is_prime:
-            primes.append(num)
-    
+    if count_only:
+        prime_count, largest_prime = prime_summary(size)
+    else:
+        # Streams the primes block by block instead of listing them all
+        prime_count, largest_prime = summarize_primes(prime_blocks(0, size))
+
     # Additional mathematical operations
-    for i in range(size):
-        result += math.sqrt(i + 1)
-        result += math.sin(i) * math.cos(i)
-        result += math.log(i + 1)
-    
+    result = math_stage(size, math_backend)
+
     # Store results
-    out_list.append({
-        'prime_count': len(primes),
+    record = {
+        'prime_count': prime_count,
         'math_result': result,
-        'largest_prime': primes[-1] if primes else None
-    })
-    
+        'largest_prime': largest_prime
+    }
+    out_list.append(record)
+
     # Print output statement
-    print(f"Process completed: Found {len(primes)} primes, "
-          f"Largest prime: {primes[-1] if primes else 'None'}, "
-          f"Math result: {result:.2f}")
-    
-    return result
\ No newline at end of file
+    if not (QUIET if quiet is None else quiet):
+        print_result(record)
+
+    return result
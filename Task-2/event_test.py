@@ -1,9 +1,11 @@
 import threading
 import time
-from do_something import do_something
+from do_something import do_something, is_quiet
+from metrics import Metrics
 
 start_event = threading.Event()
 results = []
+metrics = Metrics()
 
 def worker(id, count):
     """
@@ -12,15 +14,19 @@ def worker(id, count):
     Waits for the start event, performs computation using 'do_something',
     and stores the result along with execution time.
     """
-    print(f"[Event] Worker {id} waiting for start event...")
+    if not is_quiet():
+        print(f"[Event] Worker {id} waiting for start event...")
     start_event.wait()  # Blocks until the event is set
 
     start_time = time.time()
     out_list = []
-    result = do_something(count, out_list)
+    with metrics.task():
+        result = do_something(count, out_list)
     duration = time.time() - start_time
 
     results.append((id, out_list[0], duration))
+    if is_quiet():
+        return
     print(f"[Event] Worker {id} finished | "
           f"Prime count={out_list[0]['prime_count']}, "
           f"Largest prime={out_list[0]['largest_prime']}, "
@@ -43,9 +49,11 @@ if __name__ == "__main__":
         t.join()
 
     print("\nAll workers done (Event).")
-    print("Results Summary:")
-    for r in results:
-        print(f" - Worker {r[0]} → Prime count={r[1]['prime_count']}, "
-              f"Largest prime={r[1]['largest_prime']}, "
-              f"Math result={r[1]['math_result']:.2f}, "
-              f"Time={r[2]:.3f}s")
+    if not is_quiet():
+        print("Results Summary:")
+        for r in results:
+            print(f" - Worker {r[0]} → Prime count={r[1]['prime_count']}, "
+                  f"Largest prime={r[1]['largest_prime']}, "
+                  f"Math result={r[1]['math_result']:.2f}, "
+                  f"Time={r[2]:.3f}s")
+    metrics.report()
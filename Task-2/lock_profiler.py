@@ -0,0 +1,376 @@
+# lock_profiler.py
+import atexit
+import os
+import sys
+import threading
+import time
+
+_THREADING = os.path.abspath(threading.__file__)
+_INTERNAL = set()  # Code objects of the wrapper methods, filled in below
+
+_registry = []
+_registry_lock = threading.Lock()
+_atexit_installed = False
+
+
+def _call_site():
+    """Returns 'file:line (function)' of the first caller outside here."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if (code not in _INTERNAL
+                and os.path.abspath(code.co_filename) != _THREADING):
+            return (f"{os.path.basename(code.co_filename)}:{frame.f_lineno} "
+                    f"({code.co_name})")
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class LockStats:
+    """
+    Contention statistics of one lock, in total and per call site.
+
+    Args:
+        name (str): Name shown in the report
+        kind (str): Type of primitive (Lock, RLock, Semaphore)
+    """
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.acquisitions = 0
+        self.contended = 0  # Acquisitions that had to wait
+        self.timeouts = 0   # Attempts that gave up
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        # call site -> [acquisitions, contended, wait_total, hold_total]
+        self.sites = {}
+        self._lock = threading.Lock()
+
+    def _site(self, site):
+        entry = self.sites.get(site)
+        if entry is None:
+            entry = self.sites[site] = [0, 0, 0.0, 0.0]
+        return entry
+
+    def acquired(self, site, wait, contended):
+        with self._lock:
+            entry = self._site(site)
+            self.acquisitions += 1
+            entry[0] += 1
+            if contended:
+                self.contended += 1
+                entry[1] += 1
+            self.wait_total += wait
+            entry[2] += wait
+            if wait > self.wait_max:
+                self.wait_max = wait
+
+    def failed(self, site):
+        with self._lock:
+            self.timeouts += 1
+            self._site(site)[1] += 1
+            self.contended += 1
+
+    def released(self, site, hold):
+        with self._lock:
+            self.hold_total += hold
+            self._site(site)[3] += hold
+            if hold > self.hold_max:
+                self.hold_max = hold
+
+    def to_dict(self):
+        """Returns the statistics as a plain dict."""
+        with self._lock:
+            return {
+                'name': self.name,
+                'kind': self.kind,
+                'acquisitions': self.acquisitions,
+                'contended': self.contended,
+                'timeouts': self.timeouts,
+                'wait_total': self.wait_total,
+                'wait_max': self.wait_max,
+                'hold_total': self.hold_total,
+                'hold_max': self.hold_max,
+                'sites': {site: {'acquisitions': e[0], 'contended': e[1],
+                                 'wait_total': e[2], 'hold_total': e[3]}
+                          for site, e in self.sites.items()}
+            }
+
+
+class _ProfiledPrimitive:
+    """
+    Common acquire()/release() wrapper around a threading primitive.
+
+    acquire() first tries a non-blocking acquire; only if that fails does
+    it count as contended and time the blocking wait. Hold time runs from
+    the outermost acquire to the matching release of the same thread.
+    """
+    kind = "Lock"
+
+    def __init__(self, lock, name):
+        global _atexit_installed
+        self._lock = lock
+        self._holds = {}  # thread id -> [(acquire time, call site), ...]
+        self.stats = LockStats(name or f"{self.kind}-{id(self):x}",
+                               self.kind)
+        with _registry_lock:
+            _registry.append(self.stats)
+            if not _atexit_installed:
+                atexit.register(report)
+                _atexit_installed = True
+
+    def _acquire(self, blocking, timeout, site):
+        start = time.perf_counter()
+        if self._lock.acquire(False):
+            contended = False
+        else:
+            if not blocking:
+                self.stats.failed(site)
+                return False
+            if timeout is None or timeout < 0:
+                ok = self._lock.acquire()
+            else:
+                ok = self._lock.acquire(True, timeout)
+            if not ok:
+                self.stats.failed(site)
+                return False
+            contended = True
+        now = time.perf_counter()
+        self.stats.acquired(site, now - start, contended)
+        self._holds.setdefault(threading.get_ident(), []).append((now, site))
+        return True
+
+    def _released(self):
+        holds = self._holds.get(threading.get_ident())
+        if not holds:
+            # Released by another thread (allowed for Lock and Semaphore)
+            holds = next((h for h in self._holds.values() if h), None)
+            if not holds:
+                return
+        started, site = holds.pop()
+        self.stats.released(site, time.perf_counter() - started)
+
+    def acquire(self, blocking=True, timeout=None):
+        """Acquires like the wrapped primitive, recording the wait."""
+        return self._acquire(blocking, timeout, _call_site())
+
+    def release(self):
+        """Releases like the wrapped primitive, recording the hold time."""
+        self._released()
+        self._lock.release()
+
+    def __enter__(self):
+        self._acquire(True, None, _call_site())
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ProfiledLock(_ProfiledPrimitive):
+    """
+    Drop-in for threading.Lock that records contention.
+
+    Args:
+        name (str): Name shown in the report (default: derived from id)
+    """
+    kind = "Lock"
+
+    def __init__(self, name=None):
+        super().__init__(threading.Lock(), name)
+
+    def locked(self):
+        return self._lock.locked()
+
+    def _is_owned(self):
+        # Used by threading.Condition; avoids its acquire(False) probe
+        return self._lock.locked()
+
+
+class ProfiledRLock(_ProfiledPrimitive):
+    """
+    Drop-in for threading.RLock that records contention.
+
+    Re-entrant acquisitions by the owner are not counted: only the
+    outermost acquire is timed and the hold lasts until the outermost
+    release.
+
+    Args:
+        name (str): Name shown in the report (default: derived from id)
+    """
+    kind = "RLock"
+
+    def __init__(self, name=None):
+        super().__init__(threading.RLock(), name)
+        self._depth = 0  # Only changed by the owning thread
+
+    def acquire(self, blocking=True, timeout=None):
+        if self._depth and self._lock._is_owned():
+            self._lock.acquire()
+            self._depth += 1
+            return True
+        if self._acquire(blocking, timeout, _call_site()):
+            self._depth = 1
+            return True
+        return False
+
+    def release(self):
+        if not self._lock._is_owned():
+            raise RuntimeError("cannot release un-acquired lock")
+        if self._depth == 1:
+            self._released()
+        self._depth -= 1
+        self._lock.release()
+
+    def __enter__(self):
+        if self._depth and self._lock._is_owned():
+            self._lock.acquire()
+            self._depth += 1
+        else:
+            self._acquire(True, None, _call_site())
+            self._depth = 1
+        return self
+
+    # threading.Condition hooks: wait() releases every level of the lock
+    # and takes them back afterwards
+    def _is_owned(self):
+        return self._lock._is_owned()
+
+    def _release_save(self):
+        depth = self._depth
+        self._released()
+        self._depth = 0
+        for _ in range(depth):
+            self._lock.release()
+        return depth
+
+    def _acquire_restore(self, depth):
+        self._acquire(True, None, _call_site())
+        for _ in range(depth - 1):
+            self._lock.acquire()
+        self._depth = depth
+
+
+class ProfiledSemaphore(_ProfiledPrimitive):
+    """
+    Drop-in for threading.Semaphore that records contention.
+
+    Args:
+        value (int): Initial number of permits
+        name (str): Name shown in the report (default: derived from id)
+        bounded (bool): Wrap a BoundedSemaphore instead
+    """
+    kind = "Semaphore"
+
+    def __init__(self, value=1, name=None, bounded=False):
+        cls = threading.BoundedSemaphore if bounded else threading.Semaphore
+        super().__init__(cls(value), name)
+
+
+class ProfiledCondition(threading.Condition):
+    """
+    threading.Condition over a profiled lock.
+
+    The lock's statistics include the re-acquisition at the end of every
+    wait(), which is where notified threads contend.
+
+    Args:
+        lock: A ProfiledLock or ProfiledRLock (default: a new ProfiledRLock)
+        name (str): Name of the new lock when 'lock' is not given
+    """
+
+    def __init__(self, lock=None, name=None):
+        super().__init__(lock if lock is not None else ProfiledRLock(name))
+
+    @property
+    def stats(self):
+        return self._lock.stats
+
+
+for _cls in (_ProfiledPrimitive, ProfiledLock, ProfiledRLock):
+    _INTERNAL.update(f.__code__ for f in vars(_cls).values()
+                     if hasattr(f, "__code__"))
+
+
+def snapshot():
+    """
+    Returns the statistics of every profiled lock, most waited-on first.
+
+    Returns:
+        list: One LockStats.to_dict() per lock
+    """
+    with _registry_lock:
+        stats = [s.to_dict() for s in _registry]
+    return sorted(stats, key=lambda s: s['wait_total'], reverse=True)
+
+
+def format_report(top=10):
+    """
+    Formats the ranked contention report.
+
+    Locks are ranked by total wait time, and each lock lists its call
+    sites ranked the same way.
+
+    Args:
+        top (int): Number of locks shown
+
+    Returns:
+        str: The report text
+    """
+    lines = ["Lock contention report (ranked by total wait time)"]
+    for rank, s in enumerate(snapshot()[:top], 1):
+        if not s['acquisitions'] and not s['timeouts']:
+            continue
+        ratio = s['contended'] / max(s['acquisitions'] + s['timeouts'], 1)
+        lines.append(
+            f"{rank:>2}. {s['name']} ({s['kind']}): "
+            f"acquisitions={s['acquisitions']}, "
+            f"contended={s['contended']} ({ratio:.0%}), "
+            f"timeouts={s['timeouts']}, "
+            f"wait total={s['wait_total']:.3f}s max={s['wait_max']:.3f}s, "
+            f"hold total={s['hold_total']:.3f}s max={s['hold_max']:.3f}s")
+        sites = sorted(s['sites'].items(), key=lambda i: i[1]['wait_total'],
+                       reverse=True)
+        for site, e in sites:
+            lines.append(f"      {site}: acquisitions={e['acquisitions']}, "
+                         f"contended={e['contended']}, "
+                         f"wait={e['wait_total']:.3f}s, "
+                         f"hold={e['hold_total']:.3f}s")
+    return "\n".join(lines) + "\n"
+
+
+def report(path=None):
+    """
+    Writes the contention report; registered with atexit automatically.
+
+    Writes to 'path' (default: the LOCK_PROFILE_FILE environment
+    variable), or prints to stderr when no path is given. Nothing is
+    written if no profiled lock was ever acquired.
+    """
+    if not any(s.acquisitions or s.timeouts for s in list(_registry)):
+        return
+    path = path or os.environ.get("LOCK_PROFILE_FILE")
+    text = format_report()
+    if not path:
+        print(text, end="", file=sys.stderr)
+        return
+    with open(path, "w") as f:
+        f.write(text)
+
+
+if __name__ == "__main__":
+    lock = ProfiledLock("demo-lock")
+
+    def work():
+        for _ in range(5):
+            with lock:
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
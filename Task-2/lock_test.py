@@ -1,10 +1,14 @@
 # lock_test.py
 import threading
 import time
-from do_something import do_something
+from do_something import do_something, is_quiet
+from lock_profiler import ProfiledLock
+from metrics import Metrics
 
-lock = threading.Lock()
+# Drop-in for threading.Lock(); the contention report is printed at exit
+lock = ProfiledLock("results-lock")
 results = []
+metrics = Metrics()
 
 def worker(id, count):
     """
@@ -15,12 +19,14 @@ def worker(id, count):
     """
     start_time = time.time()
     out_list = []
-    value = do_something(count, out_list)
+    with metrics.task():
+        value = do_something(count, out_list)
     duration = time.time() - start_time
 
     # Protect shared results with a lock
     with lock:
         results.append((id, out_list[0], duration))
+    if not is_quiet():
         print(f"[Lock] Worker {id} appended result | "
               f"Prime count={out_list[0]['prime_count']}, "
               f"Largest prime={out_list[0]['largest_prime']}, "
@@ -44,9 +50,11 @@ if __name__ == "__main__":
     print("\nAll workers done (Lock).")
     print(f"Total Execution Time: {time.time() - total_start:.3f}s")
 
-    print("Results Summary:")
-    for r in results:
-        print(f" - Worker {r[0]} → Prime count={r[1]['prime_count']}, "
-              f"Largest prime={r[1]['largest_prime']}, "
-              f"Math result={r[1]['math_result']:.2f}, "
-              f"Time={r[2]:.3f}s")
+    if not is_quiet():
+        print("Results Summary:")
+        for r in results:
+            print(f" - Worker {r[0]} → Prime count={r[1]['prime_count']}, "
+                  f"Largest prime={r[1]['largest_prime']}, "
+                  f"Math result={r[1]['math_result']:.2f}, "
+                  f"Time={r[2]:.3f}s")
+    metrics.report()
@@ -0,0 +1,196 @@
+# metrics.py
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+class _Shard:
+    """Counters and histograms written by one thread only."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}  # name -> [bucket counts..., sum, count]
+
+
+class Metrics:
+    """
+    Collects counters and latency histograms for a run.
+
+    Every thread records into its own shard, so the hot path takes no lock
+    and never touches stdout; shards are only combined by snapshot().
+    Snapshots are plain dicts, so worker processes can send theirs back
+    to the parent and merge() them into one view.
+
+    Args:
+        buckets (tuple): Histogram bucket upper bounds, ending with inf
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._local = threading.local()
+        self._shards = []
+        self._merged = []
+        self._lock = threading.Lock()  # Guards the shard lists only
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, value=1):
+        """Adds 'value' to a counter."""
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Records one value (in seconds) in a histogram."""
+        histograms = self._shard().histograms
+        hist = histograms.get(name)
+        if hist is None:
+            hist = histograms[name] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                hist[i] += 1
+                break
+        hist[-2] += value
+        hist[-1] += 1
+
+    @contextmanager
+    def task(self, name="task"):
+        """
+        Times the enclosed block as one task.
+
+        Records '<name>_latency_seconds' (wall time), adds the thread's CPU
+        time to '<name>_cpu_seconds_total' and counts '<name>s_total'.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_latency_seconds",
+                         time.perf_counter() - wall_start)
+            self.inc(f"{name}_cpu_seconds_total",
+                     time.thread_time() - cpu_start)
+            self.inc(f"{name}s_total")
+
+    def snapshot(self):
+        """
+        Combines all shards and merged snapshots into one plain dict.
+
+        Returns:
+            dict: {'started', 'buckets', 'counters', 'histograms'}
+        """
+        counters = {}
+        histograms = {}
+        with self._lock:
+            parts = [(s.counters, s.histograms) for s in self._shards]
+            parts += [(m['counters'], m['histograms']) for m in self._merged]
+        for part_counters, part_histograms in parts:
+            for name, value in list(part_counters.items()):
+                counters[name] = counters.get(name, 0) + value
+            for name, hist in list(part_histograms.items()):
+                total = histograms.setdefault(name, [0] * len(hist))
+                for i, value in enumerate(hist):
+                    total[i] += value
+        return {
+            'started': self.started,
+            'buckets': list(self.buckets),
+            'counters': counters,
+            'histograms': histograms
+        }
+
+    def merge(self, snapshot):
+        """
+        Adds a snapshot from another thread pool or process.
+
+        Args:
+            snapshot (dict): Returned by snapshot() with the same buckets
+        """
+        if tuple(snapshot['buckets']) != self.buckets:
+            raise ValueError("cannot merge metrics with different buckets")
+        with self._lock:
+            self._merged.append(snapshot)
+            self.started = min(self.started, snapshot['started'])
+
+    def to_dict(self):
+        """
+        Returns the aggregated metrics with derived throughput.
+
+        Event counters (ending in 's_total' but not '_seconds_total') get a
+        matching '_per_second' rate over the time since the metrics were
+        created.
+        """
+        snap = self.snapshot()
+        elapsed = max(time.time() - snap['started'], 1e-9)
+        histograms = {}
+        for name, hist in snap['histograms'].items():
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(snap['buckets'], hist):
+                cumulative += count
+                buckets.append(["+Inf" if bound == math.inf else bound,
+                                cumulative])
+            histograms[name] = {'buckets': buckets, 'sum': hist[-2],
+                                'count': hist[-1]}
+        throughput = {name[:-len("_total")] + "_per_second": value / elapsed
+                      for name, value in snap['counters'].items()
+                      if name.endswith("s_total")
+                      and not name.endswith("_seconds_total")}
+        return {
+            'elapsed_seconds': elapsed,
+            'counters': snap['counters'],
+            'throughput': throughput,
+            'histograms': histograms
+        }
+
+    def to_json(self):
+        """Returns the metrics as a JSON document."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        data = self.to_dict()
+        lines = []
+        for name, value in sorted(data['counters'].items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        for name, value in sorted(data['throughput'].items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        for name, hist in sorted(data['histograms'].items()):
+            lines.append(f"# TYPE {name} histogram")
+            for bound, count in hist['buckets']:
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{name}_sum {hist['sum']}")
+            lines.append(f"{name}_count {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, path=None):
+        """
+        Exports the metrics at the end of a run.
+
+        Writes to 'path' (default: the METRICS_FILE environment variable)
+        as JSON if it ends in .json and as Prometheus text otherwise, or
+        prints the Prometheus text when no path is given.
+        """
+        path = path or os.environ.get("METRICS_FILE")
+        if not path:
+            print(self.to_prometheus(), end="")
+            return
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w") as f:
+            f.write(text)
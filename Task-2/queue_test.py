@@ -2,10 +2,14 @@
 import threading
 import time
 from queue import Queue
-from do_something import do_something
+from do_something import is_quiet
+from metrics import Metrics
+from result_cache import ResultCache
 
 q = Queue()
 results = []
+cache = ResultCache()  # Repeated sizes are served from the cache
+metrics = Metrics()
 NUM_CONSUMERS = 3
 
 def producer():
@@ -17,8 +21,9 @@ def producer():
     """
     for i in range(6):
         task_count = 2
-        print(f"[Queue] Producer enqueuing task {i}")
-        q.put((i, task_count))
+        if not is_quiet():
+            print(f"[Queue] Producer enqueuing task {i}")
+        q.put((i, task_count, time.perf_counter()))
 
     # Send stop signal to each consumer
     for _ in range(NUM_CONSUMERS):
@@ -34,22 +39,26 @@ def consumer(cid):
     while True:
         item = q.get()
         if item is None:
-            print(f"[Queue] Consumer {cid} received stop signal.")
+            if not is_quiet():
+                print(f"[Queue] Consumer {cid} received stop signal.")
             q.task_done()
             break
 
-        task_id, count = item
+        task_id, count, enqueued_at = item
+        metrics.observe("queue_wait_seconds", time.perf_counter() - enqueued_at)
         start_time = time.time()
         out_list = []
-        val = do_something(count, out_list)
+        with metrics.task():
+            val = cache.do_something(count, out_list)
         duration = time.time() - start_time
 
         results.append((cid, task_id, out_list[0], duration))
-        print(f"[Queue] Consumer {cid} processed task {task_id} | "
-              f"Prime count={out_list[0]['prime_count']}, "
-              f"Largest prime={out_list[0]['largest_prime']}, "
-              f"Math result={out_list[0]['math_result']:.2f}, "
-              f"Time={duration:.3f}s")
+        if not is_quiet():
+            print(f"[Queue] Consumer {cid} processed task {task_id} | "
+                  f"Prime count={out_list[0]['prime_count']}, "
+                  f"Largest prime={out_list[0]['largest_prime']}, "
+                  f"Math result={out_list[0]['math_result']:.2f}, "
+                  f"Time={duration:.3f}s")
         q.task_done()
 
 if __name__ == "__main__":
@@ -69,13 +78,16 @@ if __name__ == "__main__":
     q.join()
 
     print("\nAll queue tasks processed successfully.")
-    print("Results Summary:")
-    for r in results:
-        print(f" - Consumer {r[0]} → Task {r[1]} | "
-              f"Prime count={r[2]['prime_count']}, "
-              f"Largest prime={r[2]['largest_prime']}, "
-              f"Math result={r[2]['math_result']:.2f}, "
-              f"Time={r[3]:.3f}s")
+    if not is_quiet():
+        print("Results Summary:")
+        for r in results:
+            print(f" - Consumer {r[0]} → Task {r[1]} | "
+                  f"Prime count={r[2]['prime_count']}, "
+                  f"Largest prime={r[2]['largest_prime']}, "
+                  f"Math result={r[2]['math_result']:.2f}, "
+                  f"Time={r[3]:.3f}s")
+    print(f"Cache stats: {cache.stats()}")
+    metrics.report()
 
     # Ensure all consumer threads exit
     for c in consumers:
@@ -0,0 +1,205 @@
+# result_cache.py
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from do_something import (MATH_CHUNK, _resolved_backend, is_quiet,
+                          math_partials, prime_range_summary, primes_below,
+                          print_result)
+
+
+class _Entry:
+    """
+    Cached state of one do_something(size) call.
+
+    Besides the prime summary it keeps the sums of the complete
+    accumulation-stage chunks below 'size', which is everything needed to
+    extend the result to a larger size.
+    """
+
+    __slots__ = ("size", "prime_count", "largest_prime", "chunk_sums",
+                 "math_result")
+
+    def __init__(self, size, prime_count, largest_prime, chunk_sums,
+                 math_result):
+        self.size = size
+        self.prime_count = prime_count
+        self.largest_prime = largest_prime
+        self.chunk_sums = chunk_sums
+        self.math_result = math_result
+
+    def record(self):
+        return {
+            'prime_count': self.prime_count,
+            'math_result': self.math_result,
+            'largest_prime': self.largest_prime
+        }
+
+
+_EMPTY = _Entry(0, 0, None, [], 0.0)
+
+
+class ResultCache:
+    """
+    Memoizes do_something results by size, with LRU eviction.
+
+    A request for size N that misses the cache is built from the largest
+    cached size M < N: only the primes in [M, N) are sieved and only the
+    accumulation stage from the start of M's last, incomplete chunk is
+    recomputed. The result is identical to a fresh do_something(N) call.
+
+    Counters: 'hits' (exact size cached), 'extensions' (built from a
+    smaller cached size), 'misses' (computed from zero) and 'evictions'.
+
+    Args:
+        maxsize (int): Maximum number of cached sizes
+        path (str): Optional JSON file to load the cache from and save() to
+        math_backend (str): Accumulation-stage backend, see math_stage
+    """
+
+    def __init__(self, maxsize=128, path=None, math_backend="auto"):
+        self.maxsize = maxsize
+        self.path = path
+        self.math_backend = math_backend
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def get(self, size):
+        """
+        Returns the do_something result record for 'size'.
+
+        Args:
+            size (int): The range up to which to perform computations
+
+        Returns:
+            dict: A new record with prime_count, math_result, largest_prime
+        """
+        with self._lock:
+            entry = self._entries.get(size)
+            if entry is not None:
+                self._entries.move_to_end(size)
+                self.hits += 1
+                return entry.record()
+            base = _EMPTY
+            for cached in self._entries.values():
+                if base.size < cached.size < size:
+                    base = cached
+            if base is _EMPTY:
+                self.misses += 1
+            else:
+                self.extensions += 1
+
+        entry = self._extend(base, size)
+        with self._lock:
+            self._entries[size] = entry
+            self._entries.move_to_end(size)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry.record()
+
+    def do_something(self, size, out_list, quiet=None):
+        """
+        Drop-in replacement for do_something(size, out_list).
+
+        Appends the record to 'out_list', prints the usual summary line
+        (unless quiet) and returns math_result.
+        """
+        record = self.get(size)
+        out_list.append(record)
+        if not (is_quiet() if quiet is None else quiet):
+            print_result(record)
+        return record['math_result']
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'extensions': self.extensions,
+                'evictions': self.evictions,
+                'entries': len(self._entries)
+            }
+
+    def _extend(self, base, size):
+        """Computes the entry for 'size' from a smaller cached entry."""
+        if size <= base.size:
+            return base
+
+        # Prime stage: sieve only the new numbers [base.size, size)
+        base_primes = primes_below(math.isqrt(max(size - 1, 0)) + 1)[1:]
+        count, largest = prime_range_summary(base.size, size, base_primes)
+        prime_count = base.prime_count + count
+        largest_prime = largest if largest is not None else base.largest_prime
+
+        # Math stage: complete chunks are reused, the rest is recomputed
+        start = len(base.chunk_sums) * MATH_CHUNK
+        new_sums = list(math_partials(start, size, self.math_backend,
+                                     MATH_CHUNK))
+        sums = base.chunk_sums + new_sums
+        math_result = math.fsum(sums)
+        if size % MATH_CHUNK:
+            sums.pop()  # The last chunk is incomplete
+
+        return _Entry(size, prime_count, largest_prime, sums, math_result)
+
+    def save(self, path=None):
+        """
+        Writes the cache to a JSON file.
+
+        The file is written to a temporary name and renamed, so a crash
+        never leaves a truncated cache behind.
+
+        Args:
+            path (str): Target file (default: the path given to __init__)
+        """
+        path = path or self.path
+        with self._lock:
+            data = {
+                'math_backend': _resolved_backend(self.math_backend),
+                'math_chunk': MATH_CHUNK,
+                'entries': [[e.size, e.prime_count, e.largest_prime,
+                             e.chunk_sums, e.math_result]
+                            for e in self._entries.values()]
+            }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path=None):
+        """
+        Loads entries saved by save().
+
+        Files written with a different math backend or chunk size are
+        ignored, since their partial sums would not match; "auto" counts
+        as "python" where NumPy is not installed.
+
+        Args:
+            path (str): Source file (default: the path given to __init__)
+        """
+        path = path or self.path
+        with open(path) as f:
+            data = json.load(f)
+        if (data.get('math_backend') != _resolved_backend(self.math_backend)
+                or data.get('math_chunk') != MATH_CHUNK):
+            return
+        with self._lock:
+            for fields in data['entries'][-self.maxsize:]:
+                entry = _Entry(*fields)
+                self._entries[entry.size] = entry
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.path is not None:
+            self.save()
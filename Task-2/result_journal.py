@@ -0,0 +1,247 @@
+# result_journal.py
+import fcntl
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from do_something import do_something, set_quiet
+
+# File header: magic, record size, number of reserved slots, capacity
+HEADER = struct.Struct("<8sI4xQQ")
+HEADER_SIZE = 64
+MAGIC = b"DSJRNL01"
+COUNT_OFFSET = 16
+
+# One record: commit marker, writer pid, task_id, prime_count, math_result,
+# largest_prime (-1 = None), seconds. The marker is written last, so a
+# reader never sees half a record, and a writer that dies mid-record
+# leaves a slot that readers skip.
+RECORD = struct.Struct("<IIqqdqd")
+RECORD_SIZE = RECORD.size  # 48 bytes
+COMMITTED = 0xC0FFEE01
+MARKER = struct.Struct("<I")
+
+
+class ResultJournal:
+    """
+    Append-only journal of do_something results in a memory-mapped file.
+
+    Records have a fixed size, so record i lives at a known offset and the
+    file never holds more than the records themselves. Any number of
+    threads and processes can open the same path and append at once:
+    reserving slots takes a short lock (a threading.Lock plus flock on
+    the file) that bumps the slot counter in the header; the record itself
+    is written without the lock. The file doubles in size when full.
+
+    Readers scan the mapping in place while writes continue; scan() only
+    yields committed records. A journal object that may grow the file
+    (append) must not be used while one of its own scans is unfinished;
+    use separate objects for writing and reading.
+
+    Args:
+        path (str): Journal file, created if missing
+        capacity (int): Initial number of record slots of a new file
+    """
+
+    def __init__(self, path, capacity=1 << 16):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        self._mm = None
+        with self._locked():
+            if os.fstat(self._fd).st_size < HEADER_SIZE:
+                os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD_SIZE)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, RECORD_SIZE, 0,
+                                                capacity), 0)
+            self._remap()
+            magic, record_size, _, _ = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or record_size != RECORD_SIZE:
+                self.close()
+                raise ValueError(f"{path} is not a result journal")
+
+    @contextmanager
+    def _locked(self):
+        """Excludes other threads (threading.Lock) and processes (flock)."""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _remap(self):
+        """Maps the whole file, which may have been grown by any writer."""
+        size = os.fstat(self._fd).st_size
+        if self._mm is None or len(self._mm) < size:
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mmap.mmap(self._fd, size)
+
+    def __len__(self):
+        """Number of reserved slots (committed or still being written)."""
+        return struct.unpack_from("<Q", self._mm, COUNT_OFFSET)[0]
+
+    def _reserve(self, n):
+        """Reserves n consecutive slots and returns the first index."""
+        with self._locked():
+            self._remap()
+            _, _, count, capacity = HEADER.unpack_from(self._mm, 0)
+            if count + n > capacity:
+                while count + n > capacity:
+                    capacity *= 2
+                os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD_SIZE)
+                self._remap()
+            HEADER.pack_into(self._mm, 0, MAGIC, RECORD_SIZE, count + n,
+                             capacity)
+            return count
+
+    def append(self, task_id, record, seconds=0.0):
+        """
+        Appends one do_something record.
+
+        Args:
+            task_id (int): Caller-chosen task id
+            record (dict): A record as stored in out_list by do_something
+            seconds (float): Time the task took
+
+        Returns:
+            int: The slot index of the record
+        """
+        return self.extend([(task_id, record, seconds)])
+
+    def extend(self, entries):
+        """
+        Appends (task_id, record, seconds) entries with one reservation.
+
+        Returns:
+            int: The slot index of the first entry
+        """
+        entries = list(entries)
+        first = self._reserve(len(entries))
+        pid = os.getpid()
+        for i, (task_id, record, seconds) in enumerate(entries):
+            offset = HEADER_SIZE + (first + i) * RECORD_SIZE
+            largest = record['largest_prime']
+            RECORD.pack_into(self._mm, offset, 0, pid, task_id,
+                             record['prime_count'], record['math_result'],
+                             -1 if largest is None else largest, seconds)
+            MARKER.pack_into(self._mm, offset, COMMITTED)
+        return first
+
+    def scan(self, start=0):
+        """
+        Yields the committed records from slot 'start' on, zero-copy.
+
+        Records reserved after the scan started are not included; slots
+        still being written (or abandoned by a dead writer) are skipped.
+
+        Yields:
+            tuple: (task_id, prime_count, math_result, largest_prime,
+            seconds, pid)
+        """
+        count = len(self)
+        if HEADER_SIZE + count * RECORD_SIZE > len(self._mm):
+            with self._locked():
+                self._remap()
+        view = memoryview(self._mm)[HEADER_SIZE + start * RECORD_SIZE:
+                                    HEADER_SIZE + count * RECORD_SIZE]
+        try:
+            for (marker, pid, task_id, prime_count, math_result, largest,
+                 seconds) in RECORD.iter_unpack(view):
+                if marker == COMMITTED:
+                    yield (task_id, prime_count, math_result,
+                           None if largest < 0 else largest, seconds, pid)
+        finally:
+            view.release()
+
+    def aggregate(self):
+        """
+        Folds every committed record in one pass with flat memory.
+
+        Returns:
+            dict: records, prime_total, largest_prime, math_sum (fsum),
+            seconds and writers (distinct pids)
+        """
+        records = prime_total = 0
+        largest_prime = None
+        seconds = 0.0
+        pids = set()
+
+        def values():
+            nonlocal records, prime_total, largest_prime, seconds
+            for _, prime_count, math_result, largest, secs, pid in self.scan():
+                records += 1
+                prime_total += prime_count
+                if largest is not None and (largest_prime is None
+                                            or largest > largest_prime):
+                    largest_prime = largest
+                seconds += secs
+                pids.add(pid)
+                yield math_result
+
+        math_sum = math.fsum(values())
+        return {
+            'records': records,
+            'prime_total': prime_total,
+            'largest_prime': largest_prime,
+            'math_sum': math_sum,
+            'seconds': seconds,
+            'writers': len(pids)
+        }
+
+    def flush(self):
+        """Writes dirty pages to disk."""
+        self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _writer(path, first_task, tasks, size):
+    set_quiet()
+    with ResultJournal(path) as journal:
+        for task_id in range(first_task, first_task + tasks):
+            started = time.perf_counter()
+            out_list = []
+            do_something(size, out_list)
+            journal.append(task_id, out_list[0],
+                           time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    path = os.path.join(tempfile.gettempdir(),
+                        f"results-{os.getuid()}.journal")
+    if os.path.exists(path):
+        os.remove(path)
+    writers, tasks, size = 4, 2000, 2000
+    with ResultJournal(path, capacity=1024) as journal:
+        processes = [multiprocessing.Process(
+                         target=_writer, args=(path, w * tasks, tasks, size))
+                     for w in range(writers)]
+        for p in processes:
+            p.start()
+        # Aggregate while the writers are still appending
+        while any(p.is_alive() for p in processes):
+            print(f"[Journal] live: {journal.aggregate()['records']} records")
+            time.sleep(1)
+        for p in processes:
+            p.join()
+        print(f"[Journal] final: {journal.aggregate()}")
+        print(f"[Journal] file size: {os.path.getsize(path)} bytes")
+    os.remove(path)
@@ -2,8 +2,10 @@
 import threading
 import time
 from do_something import do_something
+from lock_profiler import ProfiledRLock
 
-rlock = threading.RLock()
+# Drop-in for threading.RLock(); the contention report is printed at exit
+rlock = ProfiledRLock("rlock")
 results = []
 
 def nested_work(id, count, depth):
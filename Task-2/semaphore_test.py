@@ -1,11 +1,14 @@
 # semaphore_test.py
 import threading
 import time
-from do_something import do_something
+from adaptive_limiter import AdaptiveSemaphore
+from result_cache import ResultCache
 
-# Allow at most 2 threads to run computation simultaneously
-sem = threading.Semaphore(2)
+# Start with at most 2 threads computing simultaneously; the limit then
+# adapts to the measured task latency and throughput
+sem = AdaptiveSemaphore(2, window=2)
 results = []
+cache = ResultCache()  # Repeated sizes are served from the cache
 
 def worker(id, count):
     """
@@ -20,7 +23,7 @@ def worker(id, count):
         print(f"[Semaphore] Worker {id} START")
         start_time = time.time()
         out_list = []
-        val = do_something(count, out_list)
+        val = cache.do_something(count, out_list)
         duration = time.time() - start_time
 
         results.append((id, out_list[0], duration))
@@ -50,3 +53,9 @@ if __name__ == "__main__":
               f"Largest prime={r[1]['largest_prime']}, "
               f"Math result={r[1]['math_result']:.2f}, "
               f"Time={r[2]:.3f}s")
+    print(f"Cache stats: {cache.stats()}")
+    print(f"Final semaphore limit: {sem.limit}")
+    for d in sem.decisions:
+        print(f" - limit {d['old_limit']} → {d['new_limit']} ({d['reason']}, "
+              f"latency={d['latency'] * 1000:.3f}ms, "
+              f"throughput={d['throughput']:.1f}/s)")
@@ -0,0 +1,165 @@
+# batched_queue.py
+import math
+import multiprocessing
+import queue
+import time
+from do_something import do_something, set_quiet
+
+# Aim for task chunks that take about this long to compute, so the cost of
+# one queue round trip is small next to the work it carries
+TARGET_CHUNK_SECONDS = 0.01
+MAX_CHUNK = 1024
+# Seconds between worker liveness checks while waiting for results
+POLL_INTERVAL = 0.1
+
+
+def worker_task(task_queue, result_queue):
+    """
+    Worker process function.
+
+    Takes chunks of (task_id, count) pairs from the task queue until it
+    receives the None sentinel, and returns one result batch per chunk
+    together with the time the chunk took to compute.
+    """
+    while True:
+        chunk = task_queue.get()
+        if chunk is None:
+            break
+        started = time.perf_counter()
+        batch = []
+        for task_id, count in chunk:
+            out_list = []
+            do_something(count, out_list)
+            batch.append((task_id, out_list[0]))
+        result_queue.put((batch, time.perf_counter() - started))
+
+
+class AdaptiveChunker:
+    """
+    Picks chunk sizes from the measured per-task cost.
+
+    The cost estimate is an exponentially weighted moving average of
+    seconds per task over completed chunks; the next chunk holds about
+    target / cost tasks. It starts with single-task chunks, so the first
+    measurements arrive quickly.
+
+    Args:
+        target (float): Desired compute time per chunk in seconds
+        max_chunk (int): Upper bound on the chunk size
+        alpha (float): Weight of the newest measurement
+    """
+
+    def __init__(self, target=TARGET_CHUNK_SECONDS, max_chunk=MAX_CHUNK,
+                 alpha=0.3):
+        self.target = target
+        self.max_chunk = max_chunk
+        self.alpha = alpha
+        self.cost = None  # Seconds per task
+
+    def update(self, tasks, seconds):
+        """Records that a chunk of 'tasks' tasks took 'seconds'."""
+        cost = seconds / tasks
+        if self.cost is None:
+            self.cost = cost
+        else:
+            self.cost += self.alpha * (cost - self.cost)
+
+    def next_size(self, remaining, workers):
+        """
+        Returns the size of the next chunk.
+
+        Never more than an even share of the remaining tasks, so the last
+        chunks do not leave workers idle.
+        """
+        if self.cost is None:
+            size = 1
+        elif self.cost <= 0:
+            size = self.max_chunk
+        else:
+            size = int(self.target / self.cost)
+        share = math.ceil(remaining / workers)
+        return max(1, min(size, self.max_chunk, share))
+
+
+def run_batched(counts, workers=2, target=TARGET_CHUNK_SECONDS,
+                context=None):
+    """
+    Runs do_something for every count on worker processes.
+
+    The parent keeps two chunks in flight per worker, sizing every new
+    chunk with an AdaptiveChunker. When all tasks are sent it puts one
+    sentinel per worker on the task queue and drains the remaining
+    result batches, so no worker relies on a racy empty() check. While
+    waiting, it checks that the workers are still alive, so a worker
+    that dies (a task raised, OOM kill) fails the run instead of
+    hanging it.
+
+    Args:
+        counts (list): Workload size of each task
+        workers (int): Number of worker processes
+        target (float): Desired compute time per chunk in seconds
+        context: multiprocessing context
+
+    Returns:
+        list: (count, result record) pairs in the order of 'counts'
+
+    Raises:
+        RuntimeError: If a worker exited before all tasks were done
+    """
+    ctx = context or multiprocessing.get_context()
+    task_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+    processes = [ctx.Process(target=worker_task,
+                             args=(task_queue, result_queue))
+                 for _ in range(workers)]
+    for p in processes:
+        p.start()
+
+    chunker = AdaptiveChunker(target)
+    tasks = list(enumerate(counts))
+    results = [None] * len(tasks)
+    sent = 0
+    in_flight = 0
+    done = 0
+    try:
+        while done < len(tasks):
+            while sent < len(tasks) and in_flight < 2 * workers:
+                size = chunker.next_size(len(tasks) - sent, workers)
+                task_queue.put(tasks[sent:sent + size])
+                sent += size
+                in_flight += 1
+            try:
+                batch, seconds = result_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                for p in processes:
+                    if p.exitcode is not None:
+                        raise RuntimeError(
+                            f"worker {p.pid} exited with code {p.exitcode} "
+                            f"with {len(tasks) - done} tasks left")
+                continue
+            in_flight -= 1
+            chunker.update(len(batch), seconds)
+            for task_id, record in batch:
+                results[task_id] = (counts[task_id], record)
+            done += len(batch)
+    except BaseException:
+        for p in processes:
+            p.terminate()  # Their chunks would never be collected
+        raise
+    finally:
+        for _ in processes:
+            task_queue.put(None)  # One stop signal per worker
+        for p in processes:
+            p.join()
+    return results
+
+
+if __name__ == "__main__":
+    set_quiet()
+    counts = [100] * 20000  # Many small tasks
+    for label, target in [("one task per message", 0),
+                          ("adaptive batches", TARGET_CHUNK_SECONDS)]:
+        start = time.perf_counter()
+        results = run_batched(counts, workers=2, target=target)
+        print(f"{label:<22}: {len(results)} tasks in "
+              f"{time.perf_counter() - start:.3f}s")
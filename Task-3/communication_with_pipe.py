@@ -1,17 +1,18 @@
 # communicating_with_pipe.py
 import multiprocessing
 from do_something import do_something
+from result_codec import as_dict, recv_record, send_record
 
 def worker_task(pipe_conn, count):
     """
     Worker process function.
 
     Performs computation using 'do_something' and sends the result
-    through the given pipe connection.
+    through the given pipe connection as a fixed 24-byte binary record.
     """
     out_list = []
     result = do_something(count, out_list)
-    pipe_conn.send(out_list[0])
+    send_record(pipe_conn, out_list[0])
     pipe_conn.close()
 
 if __name__ == "__main__":
@@ -21,7 +22,7 @@ if __name__ == "__main__":
     process.start()
 
     print("⏳ Waiting for result from pipe...")
-    result = parent_conn.recv()
+    result = as_dict(recv_record(parent_conn))
     print(f"✅ Result received from pipe | "
           f"Prime count={result['prime_count']}, "
           f"Largest prime={result['largest_prime']}, "
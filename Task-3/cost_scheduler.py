@@ -0,0 +1,276 @@
+# cost_scheduler.py
+import heapq
+import math
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from do_something import do_something, set_quiet
+from result_codec import decode, encode
+
+
+class CostModel:
+    """
+    Predicts the runtime of do_something(size) from observed runtimes.
+
+    The model is a power law, seconds = scale * size ** exponent, fitted
+    by least squares on log(size) and log(seconds) over the most recent
+    observations. Until two distinct sizes have been seen it assumes the
+    given exponent. Only the relative costs matter for ordering tasks, so
+    even the initial guess gives a sensible order.
+
+    Args:
+        exponent (float): Exponent assumed before there is data
+        history (int): Number of recent observations used for the fit
+    """
+
+    def __init__(self, exponent=1.0, history=256):
+        self.scale = 1e-7
+        self.exponent = exponent
+        self.observations = deque(maxlen=history)
+
+    def update(self, size, seconds):
+        """Records one observed runtime and refits the model."""
+        if size > 0 and seconds > 0:
+            self.observations.append((math.log(size), math.log(seconds)))
+            self.fit()
+
+    def fit(self):
+        """Refits scale and exponent to the stored observations."""
+        n = len(self.observations)
+        if not n:
+            return
+        mean_x = sum(x for x, _ in self.observations) / n
+        mean_y = sum(y for _, y in self.observations) / n
+        sxx = sum((x - mean_x) ** 2 for x, _ in self.observations)
+        if sxx > 1e-12:
+            sxy = sum((x - mean_x) * (y - mean_y)
+                      for x, y in self.observations)
+            self.exponent = sxy / sxx
+        self.scale = math.exp(mean_y - self.exponent * mean_x)
+
+    def predict(self, size):
+        """Returns the predicted runtime of one task in seconds."""
+        return self.scale * max(size, 1) ** self.exponent
+
+
+def lpt_assign(sizes, model, workers):
+    """
+    Longest-processing-time-first assignment.
+
+    Tasks are taken in order of decreasing predicted cost, and each goes
+    to the worker with the least predicted load so far.
+
+    Args:
+        sizes (list): Workload size of each task
+        model (CostModel): Cost predictions
+        workers (int): Number of workers
+
+    Returns:
+        list: One deque of (task_id, size) per worker, largest task first
+    """
+    order = sorted(range(len(sizes)), key=lambda i: model.predict(sizes[i]),
+                   reverse=True)
+    loads = [(0.0, w) for w in range(workers)]
+    queues = [deque() for _ in range(workers)]
+    for task_id in order:
+        load, w = heapq.heappop(loads)
+        queues[w].append((task_id, sizes[task_id]))
+        heapq.heappush(loads, (load + model.predict(sizes[task_id]), w))
+    return queues
+
+
+def _worker(conn):
+    """
+    Worker process function.
+
+    Receives (task_id, size) tasks until the None sentinel and sends back
+    (True, (task_id, encoded record, compute seconds)), or (False,
+    exception) if do_something raised.
+    """
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        task_id, size = task
+        started = time.perf_counter()
+        try:
+            out_list = []
+            do_something(size, out_list)
+            reply = (True, (task_id, encode(out_list[0]),
+                            time.perf_counter() - started))
+        except Exception as e:
+            reply = (False, e)
+        conn.send(reply)
+    conn.close()
+
+
+def _stats(makespan, busy, workers, steals=0):
+    idle = workers * makespan - sum(busy)
+    return {
+        'makespan': makespan,
+        'busy': sum(busy),
+        'idle': idle,
+        'utilization': sum(busy) / (workers * makespan) if makespan else 0.0,
+        'steals': steals
+    }
+
+
+class CostScheduler:
+    """
+    Runs tasks of mixed sizes with LPT ordering and work stealing.
+
+    Each worker owns a deque filled by lpt_assign() and has one task in
+    flight at a time. When it finishes, it gets the next task from the
+    front of its own deque (largest first). Once that deque is empty, it
+    steals from the back of the deque with the most predicted work left.
+    Every observed runtime updates the cost model, which is kept across
+    runs.
+
+    Args:
+        workers (int): Number of worker processes (default: CPU count)
+        model (CostModel): Cost model to start from (default: a new one)
+        context: multiprocessing context
+    """
+
+    def __init__(self, workers=None, model=None, context=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.model = model or CostModel()
+        self.ctx = context or multiprocessing.get_context()
+
+    def _next_task(self, w, queues):
+        if queues[w]:
+            return queues[w].popleft(), False
+        remaining = [sum(self.model.predict(size) for _, size in q)
+                     for q in queues]
+        victim = max(range(len(queues)), key=remaining.__getitem__)
+        if queues[victim]:
+            return queues[victim].pop(), True
+        return None, False
+
+    def run(self, sizes):
+        """
+        Runs do_something for every size.
+
+        Args:
+            sizes (list): Workload size of each task
+
+        Returns:
+            tuple: (records, stats). records[i] is the result of sizes[i]
+            as (prime_count, math_result, largest_prime); stats holds
+            makespan, busy, idle, utilization and steals.
+        """
+        start = time.perf_counter()
+        conns, processes = [], []
+        for _ in range(self.workers):
+            parent_conn, child_conn = self.ctx.Pipe()
+            p = self.ctx.Process(target=_worker, args=(child_conn,))
+            p.start()
+            child_conn.close()
+            conns.append(parent_conn)
+            processes.append(p)
+
+        records = [None] * len(sizes)
+        busy = [0.0] * self.workers
+        steals = 0
+        active = {}
+        try:
+            queues = lpt_assign(sizes, self.model, self.workers)
+            for w, conn in enumerate(conns):
+                task, stolen = self._next_task(w, queues)
+                if task is not None:
+                    conn.send(task)
+                    active[conn] = (w, task)
+                    steals += stolen
+
+            while active:
+                for conn in wait(list(active)):
+                    w, (_, size) = active.pop(conn)
+                    try:
+                        ok, value = conn.recv()
+                    except EOFError:
+                        processes[w].join(1)
+                        raise RuntimeError(
+                            f"worker {w} exited with code "
+                            f"{processes[w].exitcode} during a task") from None
+                    if not ok:
+                        raise value
+                    task_id, data, seconds = value
+                    records[task_id] = decode(data)
+                    busy[w] += seconds
+                    self.model.update(size, seconds)
+                    task, stolen = self._next_task(w, queues)
+                    if task is not None:
+                        conn.send(task)
+                        active[conn] = (w, task)
+                        steals += stolen
+            makespan = time.perf_counter() - start
+        finally:
+            for conn, p in zip(conns, processes):
+                if conn in active or not p.is_alive():
+                    p.terminate()  # Still busy with a task we gave up on
+                else:
+                    try:
+                        conn.send(None)
+                    except OSError:
+                        p.terminate()
+            for p in processes:
+                p.join()
+            for conn in conns:
+                conn.close()
+        return records, _stats(makespan, busy, self.workers, steals)
+
+
+def _timed_compute(size):
+    started = time.perf_counter()
+    out_list = []
+    do_something(size, out_list)
+    return encode(out_list[0]), time.perf_counter() - started
+
+
+def pool_map_baseline(sizes, workers=None, context=None):
+    """
+    The naive baseline: Pool.map with default chunking.
+
+    Args:
+        sizes (list): Workload size of each task
+        workers (int): Number of worker processes (default: CPU count)
+        context: multiprocessing context
+
+    Returns:
+        tuple: (records, stats) in the same form as CostScheduler.run()
+    """
+    workers = workers or multiprocessing.cpu_count()
+    ctx = context or multiprocessing.get_context()
+    start = time.perf_counter()
+    with ctx.Pool(workers) as pool:
+        results = pool.map(_timed_compute, sizes)
+    makespan = time.perf_counter() - start
+    records = [decode(data) for data, _ in results]
+    return records, _stats(makespan, [s for _, s in results], workers)
+
+
+def format_stats(label, stats):
+    return (f"{label:<16}: makespan={stats['makespan']:.3f}s, "
+            f"idle={stats['idle']:.3f}s, "
+            f"utilization={stats['utilization']:.0%}, "
+            f"steals={stats['steals']}")
+
+
+if __name__ == "__main__":
+    set_quiet()
+    workers = 3
+    # A few large tasks at the end of a mostly small batch: Pool.map hands
+    # them out last, in one chunk, and one worker grinds them alone
+    sizes = [20_000] * 24 + [400_000, 600_000, 800_000, 2_000_000]
+
+    baseline, base_stats = pool_map_baseline(sizes, workers)
+    scheduler = CostScheduler(workers)
+    scheduler.run(sizes[:6] + sizes[-2:])  # Calibrate the cost model
+    records, stats = scheduler.run(sizes)
+    assert records == baseline
+
+    print(format_stats("Pool.map", base_stats))
+    print(format_stats("LPT + stealing", stats))
+    print(f"Cost model: seconds = {scheduler.model.scale:.3g} * "
+          f"size ** {scheduler.model.exponent:.2f}")
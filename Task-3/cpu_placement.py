@@ -0,0 +1,346 @@
+# cpu_placement.py
+import argparse
+import multiprocessing
+import os
+from collections import defaultdict
+from do_something import do_something
+
+# Set CPU_PLACEMENT=compact|spread|reserve|none to choose the policy of
+# plan() without touching the scripts, like PROFILE_WORKERS.
+PLACEMENT_ENV = "CPU_PLACEMENT"
+DEFAULT_POLICY = "spread"
+POLICIES = ("compact", "spread", "reserve", "none")
+
+TOPOLOGY_DIR = "/sys/devices/system/cpu/cpu{}/topology"
+
+# CPUs of this process before pin_coordinator() narrowed its affinity
+_planned_cpus = None
+
+
+def available_cpus():
+    """
+    CPUs this process may run on, sorted.
+
+    Uses os.sched_getaffinity, so taskset, cgroups/cpusets and container
+    limits are respected; os.cpu_count() can be much larger than that.
+    Platforms without it (macOS, Windows) report every CPU.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _read_id(cpu, name):
+    try:
+        with open(os.path.join(TOPOLOGY_DIR.format(cpu), name)) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def cpu_topology(cpus=None):
+    """
+    Maps each CPU to its (package, core).
+
+    Hyper-threads of one physical core share the same key. Without
+    /sys topology every CPU counts as its own core.
+
+    Returns:
+        dict: cpu -> (package id, core id)
+    """
+    topology = {}
+    for cpu in cpus if cpus is not None else available_cpus():
+        package = _read_id(cpu, "physical_package_id")
+        core = _read_id(cpu, "core_id")
+        if package is None or core is None:
+            package, core = 0, cpu
+        topology[cpu] = (package, core)
+    return topology
+
+
+def compact_order(cpus):
+    """Packs work: all hyper-threads of a core, then the next core."""
+    topology = cpu_topology(cpus)
+    return sorted(cpus, key=lambda cpu: (topology[cpu], cpu))
+
+
+def spread_order(cpus):
+    """
+    Spreads work: one CPU per physical core first, alternating between
+    packages, and only then the second hyper-thread of each core.
+    """
+    topology = cpu_topology(cpus)
+    siblings = defaultdict(list)
+    for cpu in sorted(cpus):
+        siblings[topology[cpu]].append(cpu)
+    cores_by_package = defaultdict(list)
+    for package, core in sorted(siblings):
+        cores_by_package[package].append((package, core))
+
+    def key(cpu):
+        package, core = topology[cpu]
+        return (siblings[(package, core)].index(cpu),
+                cores_by_package[package].index((package, core)), package)
+
+    return sorted(cpus, key=key)
+
+
+def _pin_next(counter, cpus):
+    """Worker initializer: pins the caller to the next CPU of 'cpus'."""
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    pin(cpus[index % len(cpus)])
+
+
+def pin(cpu):
+    """
+    Pins the calling process (or, on Linux, the calling thread) to 'cpu'.
+
+    Returns:
+        bool: False if the platform cannot pin
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    os.sched_setaffinity(0, {cpu})
+    return True
+
+
+class Placement:
+    """
+    Which CPU each worker (and the coordinator) runs on.
+
+    Created by plan(). Worker i runs on cpus[i % len(cpus)]; with the
+    "none" policy, cpus is empty and nothing is pinned.
+
+    Attributes:
+        policy (str): compact, spread, reserve or none
+        workers (int): Number of workers to start
+        cpus (list): CPU of each worker slot, in start order
+        coordinator_cpu (int): CPU reserved for the parent, or None
+        available (list): All CPUs the plan was made from, captured at
+            plan() time so pinning the coordinator does not shrink it
+    """
+
+    def __init__(self, policy, workers, cpus, coordinator_cpu=None,
+                 available=None):
+        self.policy = policy
+        self.workers = workers
+        self.cpus = cpus
+        self.coordinator_cpu = coordinator_cpu
+        self.available = (sorted(available) if available is not None
+                          else sorted(set(cpus) | {coordinator_cpu} - {None}))
+
+    def pin_coordinator(self):
+        """
+        Pins the calling process to the reserved CPU, if there is one.
+
+        Later plan() calls in this process keep planning over the CPUs
+        this placement was made from, not just the coordinator's CPU.
+        """
+        global _planned_cpus
+        if self.coordinator_cpu is not None:
+            if _planned_cpus is None:
+                _planned_cpus = list(self.available)
+            pin(self.coordinator_cpu)
+
+    def worker_init(self, context=None):
+        """
+        Returns (initializer, initargs) that pin workers to distinct CPUs.
+
+        Works as Pool(initializer=..., initargs=...), for
+        ThreadPoolExecutor and for the task_executor backends. Every
+        worker takes the next CPU in turn from a shared counter.
+        """
+        if not self.cpus:
+            return None, ()
+        ctx = context or multiprocessing.get_context()
+        return _pin_next, (ctx.Value("i", 0), tuple(self.cpus))
+
+    def pool(self, context=None, **kwargs):
+        """Starts a multiprocessing.Pool of pinned workers."""
+        ctx = context or multiprocessing.get_context()
+        initializer, initargs = self.worker_init(ctx)
+        return ctx.Pool(self.workers, initializer, initargs, **kwargs)
+
+    def describe(self):
+        if not self.cpus:
+            return f"{self.workers} workers, not pinned"
+        text = (f"{self.workers} workers, {self.policy}: "
+                f"CPUs {self.cpus[:self.workers]}")
+        if self.coordinator_cpu is not None:
+            text += f", coordinator on CPU {self.coordinator_cpu}"
+        return text
+
+
+def plan(workers=None, policy=None, cpus=None, tasks=None):
+    """
+    Sizes and places a set of workers on the CPUs this process may use.
+
+    Policies:
+        compact: fill both hyper-threads of a core before the next core
+            (shares caches; best for workers that exchange data)
+        spread: one worker per physical core first (best for CPU-bound,
+            independent workers such as do_something)
+        reserve: keep the first CPU for the coordinator, spread the
+            workers over the rest
+        none: only size the pool, let the OS schedule
+
+    Args:
+        workers (int): Number of workers (default: one per usable CPU)
+        policy (str): One of POLICIES (default: $CPU_PLACEMENT or spread)
+        cpus (list): CPUs to use (default: available_cpus(), as it was
+            before pin_coordinator())
+        tasks (int): Number of tasks; the default worker count is capped
+            at it, since extra workers would only sit idle
+
+    Returns:
+        Placement: The plan
+    """
+    policy = policy or os.environ.get(PLACEMENT_ENV) or DEFAULT_POLICY
+    if policy not in POLICIES:
+        raise ValueError(f"unknown placement policy: {policy!r}")
+    if cpus is None:
+        cpus = _planned_cpus or available_cpus()
+    cpus = list(cpus)
+    available = list(cpus)
+
+    coordinator_cpu = None
+    if policy == "reserve" and len(cpus) > 1:
+        coordinator_cpu = compact_order(cpus)[0]
+        cpus = [cpu for cpu in cpus if cpu != coordinator_cpu]
+    workers = workers or max(min(len(cpus), tasks or len(cpus)), 1)
+
+    if policy == "none":
+        order = []
+    elif policy == "compact":
+        order = compact_order(cpus)
+    else:
+        order = spread_order(cpus)
+        if coordinator_cpu is not None:
+            # The coordinator's hyper-thread sibling is used last
+            topology = cpu_topology(order + [coordinator_cpu])
+            order.sort(key=lambda cpu:
+                       topology[cpu] == topology[coordinator_cpu])
+    return Placement(policy, workers, order, coordinator_cpu, available)
+
+
+def _read_cpu_times():
+    """Returns {cpu: (busy, total)} jiffies from /proc/stat (Linux)."""
+    times = {}
+    try:
+        with open("/proc/stat") as f:
+            for line in f:
+                name, *fields = line.split()
+                if not name.startswith("cpu") or name == "cpu":
+                    continue
+                # user nice system idle iowait irq softirq steal; guest
+                # time is already included in user and nice
+                values = [int(v) for v in fields[:8]]
+                idle = sum(values[3:5])
+                times[int(name[3:])] = (sum(values) - idle, sum(values))
+    except OSError:
+        pass
+    return times
+
+
+class CpuUsage:
+    """
+    Measures the utilization of each CPU between start and stop.
+
+    Counts the time of every process on the machine, not just ours, so
+    an otherwise idle box gives the clearest picture. Only available
+    where /proc/stat exists (Linux).
+
+    Example:
+        with CpuUsage() as usage:
+            run_workers()
+        print(usage.format(placement))
+    """
+
+    def __init__(self):
+        self._start = self._stop = None
+
+    def start(self):
+        self._start = _read_cpu_times()
+        self._stop = None
+        return self
+
+    def stop(self):
+        self._stop = _read_cpu_times()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def utilization(self):
+        """
+        Returns:
+            dict: cpu -> busy fraction (0.0 - 1.0) over the measured span
+        """
+        end = self._stop or _read_cpu_times()
+        usage = {}
+        for cpu, (busy, total) in end.items():
+            if cpu in self._start:
+                start_busy, start_total = self._start[cpu]
+                elapsed = total - start_total
+                usage[cpu] = (busy - start_busy) / elapsed if elapsed else 0.0
+        return usage
+
+    def format(self, placement=None, width=30):
+        """
+        Formats one line per usable CPU: a bar, the busy percentage and
+        the workers (or coordinator) the placement put on it. With a
+        placement, the CPUs are those it was planned over.
+        """
+        usage = self.utilization()
+        if not usage:
+            return "Per-CPU utilization is not available on this platform"
+        assigned = defaultdict(int)
+        if placement is not None:
+            for i in range(placement.workers if placement.cpus else 0):
+                assigned[placement.cpus[i % len(placement.cpus)]] += 1
+        lines = ["=== CPU utilization ==="]
+        cpus = placement.available if placement is not None else None
+        for cpu in cpus or available_cpus():
+            busy = usage.get(cpu, 0.0)
+            bar = "#" * round(busy * width)
+            line = f"CPU {cpu:3d} [{bar:<{width}}] {busy * 100:5.1f}%"
+            if assigned[cpu]:
+                line += f"  {assigned[cpu]} worker(s)"
+            if placement is not None and cpu == placement.coordinator_cpu:
+                line += "  coordinator"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def _burn(size):
+    """Demo task: returns the CPUs the worker was allowed to run on."""
+    do_something(size, [], quiet=True)
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Show or try out a CPU placement plan")
+    parser.add_argument("--policy", choices=POLICIES)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--size", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    placement = plan(args.workers, args.policy)
+    print(f"Usable CPUs: {available_cpus()} "
+          f"(os.cpu_count() = {os.cpu_count()})")
+    print(f"Placement: {placement.describe()}")
+
+    placement.pin_coordinator()
+    with CpuUsage() as usage, placement.pool() as pool:
+        affinities = pool.map(_burn, [args.size] * placement.workers * 2)
+    print(f"Worker affinities seen: "
+          f"{sorted({tuple(a) for a in affinities if a})}")
+    print(usage.format(placement))
@@ -0,0 +1,495 @@
+# distributed_tasks.py
+import argparse
+import os
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+from do_something import do_something, set_quiet
+
+HEARTBEAT_INTERVAL = 1.0  # Seconds between two heartbeats of a worker
+HEARTBEAT_TIMEOUT = 3.0   # Silence after which a worker counts as dead
+BATCH_SIZE = 4            # Tasks a worker takes per request
+POLL_INTERVAL = 0.1       # Idle worker's wait before asking again
+MAX_ATTEMPTS = 3          # Leases per task before it counts as failed
+DEFAULT_PORT = 50000
+
+
+class TaskBoard:
+    """
+    Coordinator-side state shared with the workers through a manager.
+
+    Workers lease batches of tasks with get_batch() and return them with
+    complete(). A lease stays with its worker until the batch completes or
+    the worker misses its heartbeats for HEARTBEAT_TIMEOUT seconds; then
+    reap() puts the batch back at the front of the queue. A result that
+    arrives twice (a slow worker that was declared dead) is kept once.
+
+    A re-queued task is leased on its own, so a task that kills its
+    worker takes no other tasks down with it; after 'max_attempts'
+    leases it counts as failed instead of killing every worker in turn.
+    A task that raises is reported by its worker and fails at once.
+
+    All methods run in manager server threads, so they take the lock.
+
+    Args:
+        heartbeat_timeout (float): Seconds of silence before a worker is
+            declared dead
+        max_attempts (int): Leases per task before it counts as failed
+    """
+
+    def __init__(self, heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._pending = deque()  # (task_id, size)
+        self._leases = {}        # batch_id -> (worker_id, tasks)
+        self._results = {}       # task_id -> record
+        self._attempts = {}      # task_id -> number of leases so far
+        self._failed = {}        # task_id -> reason
+        self._workers = {}       # worker_id -> stats dict
+        self._next_task = 0
+        self._next_batch = 0
+        self._requeued = 0
+        self._closed = False
+
+    def add_tasks(self, sizes):
+        """Queues one task per size and returns their task ids."""
+        with self._cond:
+            ids = list(range(self._next_task, self._next_task + len(sizes)))
+            self._next_task += len(sizes)
+            self._pending.extend(zip(ids, sizes))
+            return ids
+
+    def register(self, host, pid):
+        """Registers a worker and returns its id."""
+        with self._cond:
+            worker_id = f"{host}:{pid}:{len(self._workers)}"
+            now = time.time()
+            self._workers[worker_id] = {
+                'host': host,
+                'pid': pid,
+                'alive': True,
+                'registered': now,
+                'last_seen': now,
+                'batches': 0,
+                'tasks': 0,
+                'busy_seconds': 0.0
+            }
+            return worker_id
+
+    def _seen(self, worker_id):
+        worker = self._workers[worker_id]
+        worker['last_seen'] = time.time()
+        worker['alive'] = True
+
+    def heartbeat(self, worker_id):
+        with self._cond:
+            self._seen(worker_id)
+
+    def get_batch(self, worker_id, max_tasks=BATCH_SIZE):
+        """
+        Leases up to 'max_tasks' tasks to a worker.
+
+        Returns:
+            tuple: (batch_id, [(task_id, size), ...]), or None if nothing
+            is queued right now
+        """
+        with self._cond:
+            self._seen(worker_id)
+            if self._closed or not self._pending:
+                return None
+            if self._pending[0][0] in self._attempts:
+                max_tasks = 1  # A retry: keep a fatal task on its own
+            tasks = [self._pending.popleft()
+                     for _ in range(min(max_tasks, len(self._pending)))]
+            for task_id, _ in tasks:
+                self._attempts[task_id] = self._attempts.get(task_id, 0) + 1
+            batch_id = self._next_batch
+            self._next_batch += 1
+            self._leases[batch_id] = (worker_id, tasks)
+            return batch_id, tasks
+
+    def complete(self, worker_id, batch_id, results, seconds):
+        """
+        Stores the results of a leased batch.
+
+        Args:
+            worker_id (str): The reporting worker
+            batch_id (int): The batch from get_batch()
+            results (list): (task_id, ok, value) triples; value is the
+                record, or the repr of the exception if ok is False
+            seconds (float): Time the worker spent computing the batch
+        """
+        with self._cond:
+            self._seen(worker_id)
+            late = self._leases.pop(batch_id, None) is None
+            for task_id, ok, value in results:
+                if task_id in self._results or task_id in self._failed:
+                    continue
+                if ok:
+                    self._results[task_id] = value
+                else:
+                    self._failed[task_id] = f"task {task_id} raised {value}"
+            if late:
+                # The batch was re-queued meanwhile; do not run it again
+                self._pending = deque(
+                    t for t in self._pending
+                    if t[0] not in self._results and t[0] not in self._failed)
+            worker = self._workers[worker_id]
+            worker['batches'] += 1
+            worker['tasks'] += len(results)
+            worker['busy_seconds'] += seconds
+            self._cond.notify_all()
+
+    def reap(self):
+        """
+        Declares silent workers dead and re-queues their batches.
+
+        Tasks that already used up max_attempts leases are failed
+        instead of re-queued.
+
+        Returns:
+            int: Number of tasks re-queued
+        """
+        with self._cond:
+            now = time.time()
+            dead = set()
+            for worker_id, worker in self._workers.items():
+                if (worker['alive']
+                        and now - worker['last_seen'] > self.heartbeat_timeout):
+                    worker['alive'] = False
+                    dead.add(worker_id)
+            retry = []
+            for batch_id, (worker_id, tasks) in list(self._leases.items()):
+                if worker_id not in dead:
+                    continue
+                del self._leases[batch_id]
+                for task_id, size in tasks:
+                    attempts = self._attempts[task_id]
+                    if attempts >= self.max_attempts:
+                        self._failed[task_id] = (
+                            f"task {task_id} (size {size}) lost its worker "
+                            f"on all {attempts} attempts")
+                    else:
+                        retry.append((task_id, size))
+            self._pending.extendleft(reversed(retry))
+            self._requeued += len(retry)
+            if self._failed:
+                self._cond.notify_all()
+            return len(retry)
+
+    def results(self, task_ids, timeout=None):
+        """
+        Waits for the given tasks and returns their records in order.
+
+        Raises:
+            TimeoutError: If 'timeout' expires first
+            RuntimeError: If one of the tasks failed; the other tasks
+                keep running, but their results are dropped
+        """
+        def settled():
+            return all(t in self._results or t in self._failed
+                       for t in task_ids)
+
+        with self._cond:
+            if not self._cond.wait_for(settled, timeout):
+                raise TimeoutError("tasks still pending")
+            failed = [self._failed.pop(t) for t in task_ids
+                      if t in self._failed]
+            records = [self._results.pop(t, None) for t in task_ids]
+            for t in task_ids:
+                self._attempts.pop(t, None)
+            if failed:
+                raise RuntimeError("; ".join(failed))
+            return records
+
+    def close(self):
+        """Stops handing out tasks; workers exit at their next request."""
+        with self._cond:
+            self._closed = True
+
+    def closed(self):
+        with self._cond:
+            return self._closed
+
+    def stats(self):
+        """
+        Per-worker and per-node (host) statistics.
+
+        Returns:
+            dict: 'workers' and 'nodes' with tasks, busy time, throughput
+            (tasks per second since registering) and liveness, plus the
+            number of pending, leased and re-queued tasks
+        """
+        with self._cond:
+            now = time.time()
+            workers = {}
+            nodes = {}
+            for worker_id, w in self._workers.items():
+                elapsed = max((w['last_seen'] if not w['alive'] else now)
+                              - w['registered'], 1e-9)
+                workers[worker_id] = dict(
+                    w, throughput=w['tasks'] / elapsed,
+                    heartbeat_age=now - w['last_seen'])
+                node = nodes.setdefault(w['host'], {
+                    'workers': 0, 'alive': 0, 'tasks': 0,
+                    'busy_seconds': 0.0, 'throughput': 0.0})
+                node['workers'] += 1
+                node['alive'] += w['alive']
+                node['tasks'] += w['tasks']
+                node['busy_seconds'] += w['busy_seconds']
+                node['throughput'] += workers[worker_id]['throughput']
+            return {
+                'workers': workers,
+                'nodes': nodes,
+                'pending': len(self._pending),
+                'leased': sum(len(t) for _, t in self._leases.values()),
+                'requeued': self._requeued
+            }
+
+
+class WorkerManager(BaseManager):
+    """Client side: connects to a coordinator's board."""
+
+
+WorkerManager.register("get_board")
+
+
+class Coordinator:
+    """
+    Serves a TaskBoard over TCP and re-queues work from dead workers.
+
+    The manager server and the reaper run in daemon threads of the
+    calling process, so 'board' is the same object the workers talk to.
+    close() stops both and closes the listening socket.
+
+    Args:
+        address (tuple): (host, port) to listen on; port 0 picks a free one
+        authkey (bytes): Shared secret workers must present
+        heartbeat_timeout (float): Seconds of silence before a worker is
+            declared dead
+    """
+
+    def __init__(self, address=("127.0.0.1", DEFAULT_PORT), authkey=None,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        if not authkey:
+            raise ValueError("an authkey is required")
+        self.board = TaskBoard(heartbeat_timeout)
+
+        class _Manager(BaseManager):
+            pass
+
+        _Manager.register("get_board", callable=lambda: self.board)
+        self._server = _Manager(address=address,
+                                authkey=authkey).get_server()
+        self.address = self._server.address
+        self._stop = threading.Event()
+        self._server.stop_event = self._stop  # Ends the client handlers
+        self._accepter = threading.Thread(target=self._accept, daemon=True)
+        self._accepter.start()
+        threading.Thread(target=self._reaper, daemon=True).start()
+
+    def _accept(self):
+        # Server.serve_forever's accept loop never returns and keeps the
+        # listening socket open, so run our own that stop() can end
+        while True:
+            try:
+                conn = self._server.listener.accept()
+            except OSError:
+                if self._stop.is_set():
+                    break
+                continue
+            if self._stop.is_set():
+                conn.close()  # The wake-up connection from close()
+                break
+            threading.Thread(target=self._server.handle_request,
+                             args=(conn,), daemon=True).start()
+
+    def _reaper(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            self.board.reap()
+
+    def map(self, sizes, timeout=None):
+        """
+        Runs do_something for every size on the connected workers.
+
+        Returns:
+            list: The result records, in the order of 'sizes'
+
+        Raises:
+            RuntimeError: If a task raised, or lost its worker
+                MAX_ATTEMPTS times
+        """
+        return self.board.results(self.board.add_tasks(sizes), timeout)
+
+    def close(self):
+        """Tells the workers to exit and stops the server."""
+        if self._stop.is_set():
+            return
+        self.board.close()
+        time.sleep(2 * POLL_INTERVAL)  # Let idle workers see it
+        self._stop.set()
+        # Closing the listener does not interrupt a blocked accept(), so
+        # wake it up with a connection of our own
+        try:
+            socket.create_connection(self.address, timeout=1).close()
+        except OSError:
+            pass
+        self._accepter.join(1)
+        self._server.listener.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_worker(address, authkey, batch_size=BATCH_SIZE):
+    """
+    Worker loop: pulls batches from a coordinator until it closes.
+
+    A background thread sends a heartbeat every HEARTBEAT_INTERVAL
+    seconds, so long batches do not look like a dead worker.
+
+    Args:
+        address (tuple): The coordinator's (host, port)
+        authkey (bytes): The coordinator's authkey
+        batch_size (int): Tasks requested at a time
+
+    Returns:
+        int: Number of tasks this worker completed
+    """
+    manager = WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+    board = manager.get_board()
+    worker_id = board.register(socket.gethostname(), os.getpid())
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                board.heartbeat(worker_id)
+            except (OSError, EOFError):
+                return
+
+    threading.Thread(target=beat, daemon=True).start()
+    done = 0
+    try:
+        while True:
+            batch = board.get_batch(worker_id, batch_size)
+            if batch is None:
+                if board.closed():
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+            batch_id, tasks = batch
+            started = time.perf_counter()
+            results = []
+            for task_id, size in tasks:
+                # A failing task is reported, not fatal: only a worker
+                # that stops sending heartbeats counts as lost
+                try:
+                    out_list = []
+                    do_something(size, out_list)
+                    results.append((task_id, True, out_list[0]))
+                except Exception as exc:
+                    results.append((task_id, False, repr(exc)))
+            board.complete(worker_id, batch_id, results,
+                           time.perf_counter() - started)
+            done += len(results)
+    except (OSError, EOFError):
+        pass  # Coordinator went away
+    finally:
+        stop.set()
+    return done
+
+
+def format_stats(stats):
+    lines = [f"pending={stats['pending']}, leased={stats['leased']}, "
+             f"re-queued={stats['requeued']}"]
+    for host, node in stats['nodes'].items():
+        lines.append(f"node {host}: {node['alive']}/{node['workers']} "
+                     f"workers alive, {node['tasks']} tasks, "
+                     f"{node['throughput']:.1f} tasks/s")
+    for worker_id, w in stats['workers'].items():
+        state = "alive" if w['alive'] else "dead"
+        lines.append(f"  worker {worker_id} ({state}): {w['tasks']} tasks, "
+                     f"busy {w['busy_seconds']:.2f}s, "
+                     f"{w['throughput']:.1f} tasks/s, "
+                     f"last heartbeat {w['heartbeat_age']:.1f}s ago")
+    return "\n".join(lines)
+
+
+def _authkey(value):
+    key = value or os.environ.get("DISTRIBUTED_AUTHKEY")
+    if not key:
+        raise SystemExit("set --authkey or DISTRIBUTED_AUTHKEY")
+    return key.encode()
+
+
+def _local_worker(address, authkey):
+    set_quiet()
+    run_worker(address, authkey)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Distribute do_something tasks over TCP")
+    sub = parser.add_subparsers(dest="role")
+    coord = sub.add_parser("coordinator", help="serve tasks to workers")
+    coord.add_argument("--bind", default="127.0.0.1")
+    coord.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coord.add_argument("--authkey")
+    coord.add_argument("--tasks", type=int, default=200)
+    coord.add_argument("--size", type=int, default=200_000)
+    work = sub.add_parser("worker", help="pull tasks from a coordinator")
+    work.add_argument("--host", default="127.0.0.1")
+    work.add_argument("--port", type=int, default=DEFAULT_PORT)
+    work.add_argument("--authkey")
+    work.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.role == "coordinator":
+        with Coordinator((args.bind, args.port),
+                         _authkey(args.authkey)) as coordinator:
+            print(f"Coordinator listening on {coordinator.address}")
+            records = coordinator.map([args.size] * args.tasks)
+            print(f"{len(records)} tasks done")
+            print(format_stats(coordinator.board.stats()))
+    elif args.role == "worker":
+        set_quiet()
+        done = run_worker((args.host, args.port), _authkey(args.authkey),
+                          args.batch_size)
+        print(f"Worker finished {done} tasks")
+    else:
+        # Demo: a coordinator and three local workers, one of which dies
+        authkey = os.urandom(16)
+        with Coordinator(("127.0.0.1", 0), authkey) as coordinator:
+            workers = [Process(target=_local_worker,
+                               args=(coordinator.address, authkey))
+                       for _ in range(3)]
+            for p in workers:
+                p.start()
+            sizes = [1_000_000 + 1000 * i for i in range(120)]
+            board = coordinator.board
+            ids = board.add_tasks(sizes)
+            time.sleep(1.0)
+            print(f"Killing worker pid {workers[0].pid} mid-run...")
+            workers[0].kill()
+            records = board.results(ids, timeout=120)
+            print(f"{len(records)} tasks done, "
+                  f"largest prime of the last task: "
+                  f"{records[-1]['largest_prime']}")
+            print(format_stats(board.stats()))
+        for p in workers:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+# job_server.py
+import argparse
+import itertools
+import os
+import queue
+import signal
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+from multiprocessing import Process
+from multiprocessing.connection import Client, Listener
+from do_something import do_something, set_quiet
+from process_startup import WarmPool
+from result_codec import RECORD_SIZE, decode, encode
+
+SOCKET_PATH = os.path.join(tempfile.gettempdir(),
+                           f"do_something-{os.getuid()}.sock")
+
+# Request: request id, number of sizes, then the sizes as int64.
+# Reply: request id, status, number of records, then the records
+# (result_codec layout) or, on error, the message as UTF-8.
+REQUEST = struct.Struct("<QI")
+REPLY = struct.Struct("<QII")
+OK, ERROR = 0, 1
+SHUTDOWN = 0xFFFFFFFF  # Request count that asks the server to stop
+
+
+class JobServer:
+    """
+    Resident do_something service on a Unix domain socket.
+
+    Workers are started and warmed up once (process_startup.WarmPool),
+    so a job never pays for process creation or imports. Each client
+    connection gets a reader thread; requests on it are handed to the pool
+    as soon as they arrive, without waiting for earlier ones (pipelining),
+    and every request is answered with one message holding all of its
+    records (batched replies), possibly out of order. Replies are sent by
+    a writer thread per connection, so a slow client never holds up the
+    pool's result thread and with it the replies to everyone else. If a
+    worker dies mid-request, the pool replaces it and the request gets an
+    ERROR reply.
+
+    Args:
+        path (str): Socket path
+        processes (int): Warm worker processes (default: CPU count)
+    """
+
+    def __init__(self, path=SOCKET_PATH, processes=None):
+        self.path = path
+        self._remove_stale_socket()
+        self.pool = WarmPool(processes)
+        old_umask = os.umask(0o177)  # Socket only usable by this user
+        try:
+            self._listener = Listener(path, family="AF_UNIX")
+        finally:
+            os.umask(old_umask)
+        self._stopped = threading.Event()
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            Client(self.path, family="AF_UNIX").close()
+        except OSError:
+            os.remove(self.path)  # Left behind by a dead server
+        else:
+            raise RuntimeError(f"a server is already listening on {self.path}")
+
+    def serve_forever(self):
+        """Accepts clients until stop() or a shutdown request."""
+        while True:
+            conn = self._listener.accept()
+            if self._stopped.is_set():
+                conn.close()  # The wake-up connection from stop()
+                break
+            threading.Thread(target=self._handle, args=(conn,),
+                             daemon=True).start()
+        self._close()
+
+    def _handle(self, conn):
+        # The pool calls done/failed on its single result thread, so they
+        # only queue the reply; this connection's writer sends it
+        replies = queue.SimpleQueue()
+        writer = threading.Thread(target=self._write, args=(conn, replies),
+                                  daemon=True)
+        writer.start()
+
+        def done(request_id, records):
+            replies.put((request_id, OK, records))
+
+        def failed(request_id, exc):
+            replies.put((request_id, ERROR, exc))
+
+        try:
+            while True:
+                message = conn.recv_bytes()
+                request_id, count = REQUEST.unpack_from(message)
+                if count == SHUTDOWN:
+                    self.stop()
+                    break
+                sizes = array("q", message[REQUEST.size:]).tolist()
+                try:
+                    self.pool.map_async(
+                        sizes,
+                        callback=lambda records, rid=request_id:
+                            done(rid, records),
+                        error_callback=lambda exc, rid=request_id:
+                            failed(rid, exc))
+                except Exception as exc:
+                    failed(request_id, exc)
+        except (EOFError, OSError):
+            pass  # Client disconnected
+        finally:
+            replies.put(None)  # The writer closes the connection
+
+    @staticmethod
+    def _write(conn, replies):
+        try:
+            while True:
+                reply = replies.get()
+                if reply is None:
+                    break
+                request_id, status, value = reply
+                if status == OK:
+                    count, payload = len(value), b"".join(map(encode, value))
+                else:
+                    count, payload = 0, repr(value).encode()
+                conn.send_bytes(REPLY.pack(request_id, status, count)
+                                + payload)
+        except OSError:
+            pass  # Client went away; replies still queued are dropped
+        finally:
+            conn.close()
+
+    def stop(self):
+        """Stops accepting clients; serve_forever() then returns."""
+        if not self._stopped.is_set():
+            self._stopped.set()
+            # Closing the listener does not interrupt a blocked accept(),
+            # so wake it up with a connection of our own
+            try:
+                Client(self.path, family="AF_UNIX").close()
+            except OSError:
+                pass
+
+    def _close(self):
+        self._listener.close()
+        self.pool.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _Channel:
+    """One client connection with its reader thread and pending futures."""
+
+    def __init__(self, path):
+        self.conn = Client(path, family="AF_UNIX")
+        self.send_lock = threading.Lock()
+        self.pending = {}  # request id -> Future
+        self.lost = None   # Why the reader stopped; guarded by _lock
+        self._lock = threading.Lock()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        try:
+            while True:
+                message = self.conn.recv_bytes()
+                request_id, status, count = REPLY.unpack_from(message)
+                with self._lock:
+                    fut = self.pending.pop(request_id)
+                if status == OK:
+                    fut.set_result([decode(message, REPLY.size + i * RECORD_SIZE)
+                                    for i in range(count)])
+                else:
+                    fut.set_exception(RuntimeError(
+                        message[REPLY.size:].decode()))
+        except (EOFError, OSError) as e:
+            with self._lock:
+                self.lost = e
+                pending, self.pending = self.pending, {}
+            for fut in pending.values():
+                self._fail(fut, e)
+
+    @staticmethod
+    def _fail(fut, e):
+        if not fut.done():
+            fut.set_exception(ConnectionError(
+                f"job server connection lost: {e!r}"))
+
+    def send(self, request_id, sizes, fut):
+        # Registering and checking 'lost' under one lock: once the reader
+        # has given up, nothing would ever resolve a new pending future
+        with self._lock:
+            if self.lost is not None:
+                self._fail(fut, self.lost)
+                return
+            self.pending[request_id] = fut
+        try:
+            with self.send_lock:
+                self.conn.send_bytes(REQUEST.pack(request_id, len(sizes))
+                                     + array("q", sizes).tobytes())
+        except OSError as e:
+            with self._lock:
+                self.pending.pop(request_id, None)
+            self._fail(fut, e)
+
+
+class JobClient:
+    """
+    Client with a pool of connections to a JobServer.
+
+    submit() sends a request and returns at once, so any number of
+    requests can be in flight on each connection; requests are spread
+    over the connections round robin. Results are
+    (prime_count, math_result, largest_prime) tuples, as in result_codec.
+
+    Args:
+        path (str): Socket path of the server
+        connections (int): Number of pooled connections
+    """
+
+    def __init__(self, path=SOCKET_PATH, connections=2):
+        self.path = path
+        self._channels = [_Channel(path) for _ in range(connections)]
+        self._next_channel = itertools.cycle(self._channels)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, sizes):
+        """
+        Sends one request for a batch of jobs.
+
+        Returns:
+            Future: Resolves to the list of results, in the order of 'sizes'
+        """
+        fut = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            channel = next(self._next_channel)
+        channel.send(request_id, list(sizes), fut)
+        return fut
+
+    def run(self, size):
+        """Runs one job and waits for its result."""
+        return self.submit([size]).result()[0]
+
+    def map(self, sizes, batch_size=64):
+        """
+        Runs many jobs, pipelined in batches of 'batch_size'.
+
+        Returns:
+            list: The results, in the order of 'sizes'
+        """
+        sizes = list(sizes)
+        futures = [self.submit(sizes[i:i + batch_size])
+                   for i in range(0, len(sizes), batch_size)]
+        return [r for fut in futures for r in fut.result()]
+
+    def shutdown_server(self):
+        """Asks the server to stop accepting clients and exit."""
+        channel = self._channels[0]
+        with channel.send_lock:
+            channel.conn.send_bytes(REQUEST.pack(0, SHUTDOWN))
+
+    def close(self):
+        for channel in self._channels:
+            channel.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def serve(path=SOCKET_PATH, processes=None):
+    """Runs a JobServer until shutdown or SIGTERM."""
+    set_quiet()
+    server = JobServer(path, processes)
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    print(f"[JobServer] listening on {path} "
+          f"with {server.pool.processes} warm workers")
+    server.serve_forever()
+
+
+def _fresh_process_job(size):
+    do_something(size, [])
+
+
+def wait_for_server(path=SOCKET_PATH, timeout=30):
+    """Waits until a server accepts connections at 'path'."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            Client(path, family="AF_UNIX").close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resident do_something job server")
+    parser.add_argument("command", nargs="?", default="demo",
+                        choices=["serve", "submit", "shutdown", "demo"])
+    parser.add_argument("sizes", nargs="*", type=int)
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket, args.processes)
+    elif args.command == "submit":
+        with JobClient(args.socket, connections=1) as client:
+            for size, result in zip(args.sizes, client.map(args.sizes)):
+                print(f"size={size} → Prime count={result[0]}, "
+                      f"Largest prime={result[2]}, Math result={result[1]:.2f}")
+    elif args.command == "shutdown":
+        with JobClient(args.socket, connections=1) as client:
+            client.shutdown_server()
+    else:
+        set_quiet()
+        server = Process(target=serve, args=(args.socket, args.processes))
+        server.start()
+        wait_for_server(args.socket)
+        jobs = [100] * 200
+
+        start = time.perf_counter()
+        for size in jobs[:20]:
+            p = Process(target=_fresh_process_job, args=(size,))
+            p.start()
+            p.join()
+        fresh = (time.perf_counter() - start) / 20
+
+        with JobClient(args.socket) as client:
+            start = time.perf_counter()
+            for size in jobs:
+                client.run(size)
+            one_by_one = (time.perf_counter() - start) / len(jobs)
+            start = time.perf_counter()
+            client.map(jobs, batch_size=16)
+            pipelined = (time.perf_counter() - start) / len(jobs)
+            client.shutdown_server()
+        server.join()
+
+        print(f"fresh process per job  : {fresh * 1000:8.3f} ms/job")
+        print(f"job server, one by one : {one_by_one * 1000:8.3f} ms/job")
+        print(f"job server, pipelined  : {pipelined * 1000:8.3f} ms/job")
+
+
+if __name__ == "__main__":
+    main()
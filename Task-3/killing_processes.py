@@ -1,32 +1,88 @@
 # killing_processes.py
 import multiprocessing
+import os
+import tempfile
 import time
 from do_something import do_something
+from progress_board import ProgressBoard, ProgressMonitor
 
-def long_task():
+SIZE = 10_000_000       # Large workload
+STATE_FILE = os.path.join(tempfile.gettempdir(),
+                          f"long_task-{os.getuid()}.checkpoint.json")
+DEADLINE = 2            # Seconds the task may run per attempt
+GRACE = 1               # Extra seconds before the task is terminated
+MAX_ATTEMPTS = 10
+WATCH_INTERVAL = 0.5    # Seconds between progress reports
+
+def long_task(deadline, finished, board_name):
     """
     Long-running process task.
 
-    Performs a heavy computation using 'do_something'.
+    Performs a heavy computation using 'do_something' with checkpoints:
+    progress is saved to STATE_FILE while it runs, and at the deadline it
+    stops cooperatively with a partial result instead of losing its work.
+    A later call picks up from the saved state. 'finished' is set once
+    the whole task is done. Live progress goes to slot 0 of the
+    progress board 'board_name'.
     """
     print("🚀 Process started... performing heavy computation")
     out_list = []
-    do_something(10, out_list)  # Large workload
-    print("✅ Task finished successfully | "
-          f"Prime count={out_list[0]['prime_count']}, "
-          f"Largest prime={out_list[0]['largest_prime']}, "
-          f"Math result={out_list[0]['math_result']:.2f}")
+    with ProgressBoard(name=board_name) as board:
+        do_something(SIZE, out_list, checkpoint=STATE_FILE,
+                     deadline=deadline, quiet=True, progress=board.slot(0))
+    record = out_list[0]
+    if not record.get('partial'):
+        finished.set()
+    status = ("⏸️ Deadline reached, checkpoint saved"
+              if record.get('partial') else "✅ Task finished successfully")
+    print(f"{status} | "
+          f"Prime count={record['prime_count']}, "
+          f"Largest prime={record['largest_prime']}, "
+          f"Math result={record['math_result']:.2f}")
+
+def watch_task(p, monitor, timeout):
+    """
+    Waits up to 'timeout' seconds for 'p', printing its live progress.
+
+    Returns:
+        dict: The last progress sample of the task
+    """
+    stop_at = time.time() + timeout
+    status = monitor.sample()[0]
+    while p.is_alive() and time.time() < stop_at:
+        p.join(timeout=WATCH_INTERVAL)
+        status = monitor.sample()[0]
+        eta = f"{status['eta']:.1f}s" if status['eta'] is not None else "?"
+        print(f"📈 {status['state']}: num={status['num']}, "
+              f"primes={status['primes']}, ETA {eta}")
+        if status['state'] == "stalled":
+            break  # No heartbeat: no point waiting for the deadline
+    return status
 
 if __name__ == "__main__":
-    p = multiprocessing.Process(target=long_task)
-    p.start()
+    finished = multiprocessing.Event()
+    with ProgressBoard(1) as board:
+        monitor = ProgressMonitor(board)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            p = multiprocessing.Process(
+                target=long_task,
+                args=(time.time() + DEADLINE, finished, board.name))
+            p.start()
+
+            # The task stops itself at the deadline; wait a little longer
+            status = watch_task(p, monitor, DEADLINE + GRACE)
 
-    # Wait for 2 seconds only
-    p.join(timeout=2)
+            if p.is_alive():
+                # Last resort: only the work since the last checkpoint is lost
+                print(f"⛔ Timeout reached ({status['state']}, about "
+                      f"{status['fraction']:.0%} done)! "
+                      f"Terminating the process...")
+                p.terminate()
+                p.join()
 
-    if p.is_alive():
-        print("⛔ Timeout reached! Terminating the process...")
-        p.terminate()
-        p.join()
+            if finished.is_set():
+                print(f"✅ Task completed after {attempt} attempt(s).")
+                break
+            print(f"🔁 Attempt {attempt} stopped; resuming from checkpoint...")
 
     print("✅ Process terminated safely.")
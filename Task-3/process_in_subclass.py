@@ -1,5 +1,6 @@
 from multiprocessing import Process
 from do_something import do_something
+from worker_profiler import profiled, report, reset
 
 class PrimeComputationProcess(Process):
     """
@@ -9,6 +10,7 @@ class PrimeComputationProcess(Process):
         super().__init__(*args, **kwargs)
         self.count = count
 
+    @profiled
     def run(self):
         """
         Run method executed by the process.
@@ -24,6 +26,7 @@ class PrimeComputationProcess(Process):
               f"Math result={res['math_result']:.2f}")
 
 if __name__ == "__main__":
+    reset()  # Set PROFILE_WORKERS=<directory> to profile the workers
     workers = [
         PrimeComputationProcess(1, name="PrimeWorker-1"),
         PrimeComputationProcess(2, name="PrimeWorker-2"),
@@ -37,3 +40,4 @@ if __name__ == "__main__":
         w.join()
 
     print("✅ All prime computation workers completed!")
+    report()  # Merged worker profile (only if profiling)
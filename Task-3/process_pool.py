@@ -1,28 +1,44 @@
 # pool_process.py
-from multiprocessing import Pool
-from do_something import do_something
+from cpu_placement import CpuUsage, plan
+from result_cache import ResultCache
+from result_codec import decode, encode
+from worker_profiler import profiled, report, reset
 
+# Each worker process keeps its own cache, so growing sizes handled by the
+# same worker only compute the new part of the range
+cache = ResultCache()
+
+@profiled
 def compute(count):
     """
     Worker function for process pool.
 
-    Performs computation using 'do_something' and returns structured result.
+    Performs computation using 'do_something' and returns the result as
+    a compact binary record (see result_codec.py).
     """
     out_list = []
-    do_something(count, out_list)
-    res = out_list[0]
-    return f"Task Count={count} → Prime count={res['prime_count']}, " \
-           f"Largest prime={res['largest_prime']}, " \
-           f"Math result={res['math_result']:.2f}"
+    cache.do_something(count, out_list)
+    return encode(out_list[0])
 
 if __name__ == "__main__":
+    reset()  # Set PROFILE_WORKERS=<directory> to profile the workers
     counts = [1, 2, 3, 4, 5]  # 5 tasks
 
-    with Pool(processes=3) as pool:  # 3 workers
+    # One pinned worker per usable CPU, never more workers than tasks
+    # (set CPU_PLACEMENT=compact|spread|reserve|none to change the policy)
+    placement = plan(tasks=len(counts))
+    placement.pin_coordinator()
+    with CpuUsage() as usage, placement.pool() as pool:
         results = pool.map(compute, counts)
 
     print("=== Pool Results ===")
-    for r in results:
-        print(r)
+    for count, r in zip(counts, results):
+        prime_count, math_result, largest_prime = decode(r)
+        print(f"Task Count={count} → Prime count={prime_count}, "
+              f"Largest prime={largest_prime}, "
+              f"Math result={math_result:.2f}")
 
     print("✅ Process Pool computation completed!")
+    print(f"Placement: {placement.describe()}")
+    print(usage.format(placement))
+    report()  # Merged worker profile (only if profiling)
@@ -0,0 +1,273 @@
+# process_startup.py
+import functools
+import itertools
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from do_something import do_something, set_quiet
+
+# Modules the forkserver imports once, before it forks any worker
+PRELOAD_MODULES = ["do_something"]
+
+# Seconds between checks for workers that died while running a job
+WATCH_INTERVAL = 0.1
+
+# Per-worker table of running jobs: (pid, job id) pairs, set in _warm_up
+_jobs = None
+_slot = None
+
+
+def startup_context(method=None, preload=PRELOAD_MODULES):
+    """
+    Returns a multiprocessing context optimized for worker start-up.
+
+    By default this is forkserver with 'preload' already imported in the
+    server, so every worker is forked from a process that has paid the
+    interpreter start-up and import cost once. Platforms without
+    forkserver (Windows) fall back to spawn.
+
+    Args:
+        method (str): Force fork, spawn or forkserver
+        preload (list): Modules to import in the forkserver
+
+    Returns:
+        multiprocessing.context.BaseContext: The context
+    """
+    if method is None:
+        methods = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in methods else "spawn"
+    ctx = multiprocessing.get_context(method)
+    if method == "forkserver" and preload:
+        # Only effective before the forkserver of this process starts
+        ctx.set_forkserver_preload(list(preload))
+    return ctx
+
+
+def _warm_up(ready, jobs):
+    """
+    Pool initializer: claim a slot in the job table, run one tiny task,
+    then report ready.
+
+    Reporting never blocks, so a worker the pool starts later to replace
+    a dead one warms up and goes straight to work.
+    """
+    global _jobs, _slot
+    _jobs = jobs
+    _slot = _claim_slot(jobs)
+    do_something(1, [], quiet=True)
+    ready.release()
+
+
+def _claim_slot(jobs):
+    while True:
+        with jobs.get_lock():
+            for i in range(0, len(jobs), 2):
+                if jobs[i] == 0:
+                    jobs[i], jobs[i + 1] = os.getpid(), 0
+                    return i
+        time.sleep(WATCH_INTERVAL)  # Until a dead worker's slot is freed
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _run_task(size):
+    out_list = []
+    do_something(size, out_list)
+    return out_list[0]
+
+
+def _run_job_task(job, size):
+    _jobs[_slot + 1] = job  # Lets the parent fail the job if we die
+    try:
+        return _run_task(size)
+    finally:
+        _jobs[_slot + 1] = 0
+
+
+class WarmPool:
+    """
+    A process pool whose workers are started and warmed up in advance.
+
+    The constructor only returns once every worker has imported
+    do_something and run a first tiny task, so later submissions never
+    wait for process creation or imports.
+
+    multiprocessing.Pool replaces a worker that dies, but the task it
+    was running is lost and its result never arrives. For map_async,
+    each worker records the job it is running in a shared table, and a
+    watcher thread calls the job's error_callback once the worker is
+    gone.
+
+    Args:
+        processes (int): Number of workers (default: CPU count)
+        context: multiprocessing context (default: startup_context())
+    """
+
+    def __init__(self, processes=None, context=None):
+        ctx = context or startup_context()
+        self.processes = processes or ctx.cpu_count()
+        ready = ctx.Semaphore(0)
+        # Twice the slots, so a replacement never waits for a free one
+        self._jobs = ctx.Array("q", 4 * self.processes)
+        self._pool = ctx.Pool(self.processes, _warm_up, (ready, self._jobs))
+        for _ in range(self.processes):
+            ready.acquire()  # Until all workers are idle and warm
+        self._lock = threading.Condition()  # Notified when a job settles
+        self._error_callbacks = {}  # job id -> error_callback
+        self._lost = False          # A job was lost with its worker
+        self._job_ids = itertools.count(1)
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop.wait(WATCH_INTERVAL):
+            lost = []
+            with self._jobs.get_lock():
+                for i in range(0, len(self._jobs), 2):
+                    pid, job = self._jobs[i], self._jobs[i + 1]
+                    if pid and not _alive(pid):
+                        self._jobs[i] = self._jobs[i + 1] = 0
+                        if job:
+                            lost.append((pid, job))
+            for pid, job in lost:
+                with self._lock:
+                    error_callback = self._error_callbacks.pop(job, None)
+                    self._lost = True
+                    self._lock.notify_all()
+                if error_callback is not None:
+                    error_callback(RuntimeError(
+                        f"worker {pid} died while running this job"))
+
+    def apply_async(self, size):
+        """Submits do_something(size); returns an AsyncResult."""
+        return self._pool.apply_async(_run_task, (size,))
+
+    def map(self, sizes):
+        """Runs do_something for every size; returns the result records."""
+        return self._pool.map(_run_task, sizes)
+
+    def map_async(self, sizes, callback=None, error_callback=None):
+        """
+        Submits do_something for every size; returns an AsyncResult.
+
+        'callback' receives the list of result records, in order. Exactly
+        one of the callbacks is called; 'error_callback' also if a worker
+        dies while running one of the tasks, in which case the
+        AsyncResult itself never becomes ready.
+        """
+        # Pool's default chunking, from the fixed worker count: the pool's
+        # own count is briefly zero while it replaces a dead worker
+        chunksize, extra = divmod(len(sizes), self.processes * 4)
+        if extra or not chunksize:
+            chunksize += 1
+        job = next(self._job_ids)
+        with self._lock:
+            self._error_callbacks[job] = error_callback
+
+        def finish(exc=None, records=None):
+            with self._lock:
+                if self._error_callbacks.pop(job, False) is False:
+                    return  # Already failed by the watcher
+                self._lock.notify_all()
+            if exc is None and callback is not None:
+                callback(records)
+            elif exc is not None and error_callback is not None:
+                error_callback(exc)
+
+        return self._pool.map_async(
+            functools.partial(_run_job_task, job), sizes, chunksize,
+            callback=lambda records: finish(records=records),
+            error_callback=finish)
+
+    def close(self):
+        """Waits for the submitted jobs, then stops the workers."""
+        self._pool.close()
+        with self._lock:
+            self._lock.wait_for(lambda: not self._error_callbacks)
+            lost = self._lost
+        self._stop.set()
+        if lost:
+            # Pool.join() would wait forever for the lost tasks' results
+            self._pool.terminate()
+        else:
+            self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _first_task(started, result_queue):
+    do_something(1, [], quiet=True)
+    result_queue.put(time.time() - started)
+
+
+def time_to_first_task(method, workers=4, preload=PRELOAD_MODULES):
+    """
+    Measures how long each new worker takes to finish its first task.
+
+    The clock starts when the parent calls Process.start() and stops when
+    the worker has finished do_something(1) (interpreter start-up,
+    imports, unpickling and the task itself).
+
+    Args:
+        method (str): fork, spawn or forkserver
+        workers (int): Number of workers to start
+        preload (list): Modules preloaded into the forkserver
+
+    Returns:
+        list: Seconds per worker
+    """
+    ctx = startup_context(method, preload)
+    result_queue = ctx.Queue()
+    processes = []
+    for _ in range(workers):
+        p = ctx.Process(target=_first_task, args=(time.time(), result_queue))
+        p.start()
+        processes.append(p)
+    times = [result_queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return times
+
+
+def warm_pool_first_task(workers=4, context=None):
+    """
+    Same measurement for a WarmPool, from submission to completion.
+
+    Returns:
+        list: Seconds per task, one task per worker
+    """
+    with WarmPool(workers, context) as pool:
+        times = []
+        for _ in range(workers):
+            started = time.time()
+            pool.apply_async(1).get()
+            times.append(time.time() - started)
+    return times
+
+
+if __name__ == "__main__":
+    set_quiet()
+    workers = 4
+    for method in multiprocessing.get_all_start_methods():
+        times = time_to_first_task(method, workers)
+        label = method + (" (preloaded)" if method == "forkserver" else "")
+        print(f"{label:<24} mean={statistics.fmean(times) * 1000:8.2f} ms  "
+              f"max={max(times) * 1000:8.2f} ms")
+    times = warm_pool_first_task(workers)
+    print(f"{'warm pool':<24} mean={statistics.fmean(times) * 1000:8.2f} ms  "
+          f"max={max(times) * 1000:8.2f} ms")
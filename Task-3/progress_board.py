@@ -0,0 +1,339 @@
+# progress_board.py
+import argparse
+import multiprocessing
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from do_something import (STAGE_DONE, STAGE_MATH, STAGE_SIEVE, do_something,
+                          set_quiet)
+
+STAGE_IDLE = 0
+STAGE_NAMES = {STAGE_IDLE: "idle", STAGE_SIEVE: "sieve",
+               STAGE_MATH: "math", STAGE_DONE: "done"}
+
+# Board header: number of slots. Slots start on the next cache line.
+BOARD = struct.Struct("<Q")
+BOARD_SIZE = 64
+
+# One slot per worker, 128 bytes apart so two workers never write to the
+# same cache line (or its prefetched neighbour):
+#   sequence | pid, tasks, size, started | num, primes, stage, heartbeat
+SEQ = struct.Struct("<Q")
+TASK = struct.Struct("<qqqd")
+TASK_OFFSET = SEQ.size
+PROGRESS = struct.Struct("<qqqd")
+PROGRESS_OFFSET = TASK_OFFSET + TASK.size
+SLOT = struct.Struct("<Qqqqdqqqd")
+SLOT_SIZE = 128
+
+FIELDS = ("pid", "tasks", "size", "started", "num", "primes", "stage",
+          "heartbeat")
+
+# Seconds without a heartbeat after which a busy worker counts as stalled
+STALL_AFTER = 2.0
+
+
+class ProgressSlot:
+    """
+    Write side of one slot; only one process may write to a slot.
+
+    Every write is bracketed by the slot's sequence number (a seqlock):
+    it becomes odd before the fields change and even again afterwards,
+    so readers can detect and retry a torn read instead of taking a lock.
+    Pass the slot to do_something(progress=...).
+    """
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        self._offset = offset
+        self._seq = SEQ.unpack_from(buf, offset)[0]
+        self._seq += self._seq & 1  # A writer may have died mid-write
+        self._tasks = TASK.unpack_from(buf, offset + TASK_OFFSET)[1]
+
+    def begin(self, size):
+        """Starts a new task of 'size' in this slot."""
+        now = time.time()
+        self._tasks += 1
+        SEQ.pack_into(self._buf, self._offset, self._seq + 1)
+        TASK.pack_into(self._buf, self._offset + TASK_OFFSET,
+                       os.getpid(), self._tasks, size, now)
+        PROGRESS.pack_into(self._buf, self._offset + PROGRESS_OFFSET,
+                           0, 0, STAGE_SIEVE, now)
+        self._seq += 2
+        SEQ.pack_into(self._buf, self._offset, self._seq)
+
+    def update(self, num, primes, stage):
+        """Publishes the current number, primes found and stage."""
+        SEQ.pack_into(self._buf, self._offset, self._seq + 1)
+        PROGRESS.pack_into(self._buf, self._offset + PROGRESS_OFFSET,
+                           num, primes, stage, time.time())
+        self._seq += 2
+        SEQ.pack_into(self._buf, self._offset, self._seq)
+
+
+class ProgressBoard:
+    """
+    Per-worker progress slots in one shared-memory block.
+
+    Workers write their own slot without locks (see ProgressSlot); any
+    process that knows the block's name can read all slots at any rate
+    without slowing the workers down. The seqlock relies on stores
+    becoming visible in program order, as they do on x86; elsewhere a
+    reader may, rarely, see a mixed snapshot, which only affects what is
+    displayed.
+
+    Args:
+        slots (int): Number of slots of a new board
+        name (str): Attach to the existing board with this name instead
+        track (bool): False when attaching from a process outside the
+            creator's process tree (such as the watch command), whose
+            resource tracker would otherwise unlink the board at exit
+    """
+
+    def __init__(self, slots=None, name=None, track=True):
+        if name is None:
+            size = BOARD_SIZE + slots * SLOT_SIZE
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+            BOARD.pack_into(self._shm.buf, 0, slots)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if not track:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+            self._owner = False
+        self.name = self._shm.name
+        self.slots = BOARD.unpack_from(self._shm.buf, 0)[0]
+
+    def slot(self, index):
+        """Returns the writer of slot 'index'."""
+        if not 0 <= index < self.slots:
+            raise IndexError(f"slot {index} out of range")
+        return ProgressSlot(self._shm.buf, BOARD_SIZE + index * SLOT_SIZE)
+
+    def read(self, index):
+        """
+        Returns a consistent snapshot of slot 'index'.
+
+        Returns:
+            dict: pid, tasks, size, started, num, primes, stage, heartbeat
+        """
+        buf = self._shm.buf
+        offset = BOARD_SIZE + index * SLOT_SIZE
+        while True:
+            seq, *values = SLOT.unpack_from(buf, offset)
+            if not seq & 1 and SEQ.unpack_from(buf, offset)[0] == seq:
+                return dict(zip(FIELDS, values))
+            time.sleep(0)  # A write is in progress; let the writer finish
+
+    def read_all(self):
+        return [self.read(i) for i in range(self.slots)]
+
+    def close(self):
+        """Detaches; the board that created the block also unlinks it."""
+        if self._shm is None:
+            return
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fraction_done(slot):
+    """
+    Share of a task that is done; each of the two stages counts as half.
+    """
+    stage, size = slot['stage'], slot['size']
+    if stage == STAGE_DONE:
+        return 1.0
+    if size <= 0 or stage == STAGE_IDLE:
+        return 0.0
+    done = slot['num'] + (size if stage == STAGE_MATH else 0)
+    return min(done / (2 * size), 1.0)
+
+
+class ProgressMonitor:
+    """
+    Turns successive board snapshots into throughput, ETA and stalls.
+
+    The two stages run at very different speeds, so each slot keeps a
+    smoothed rate (numbers per second) per stage, carried over from one
+    task to the next of the same worker. The ETA is the rest of the
+    current stage at its rate, plus the whole math stage while still
+    sieving; it is unknown until both rates have been seen. Call
+    sample() at whatever rate the display needs.
+
+    Args:
+        board (ProgressBoard): The board to watch
+        stall_after (float): Heartbeat age that marks a busy worker stalled
+        smoothing (float): Weight of the newest rate (0-1)
+    """
+
+    def __init__(self, board, stall_after=STALL_AFTER, smoothing=0.3):
+        self.board = board
+        self.stall_after = stall_after
+        self.smoothing = smoothing
+        self._last = {}   # slot -> (pid, tasks, stage, num, time)
+        self._rates = {}  # slot -> (pid, {stage: numbers per second})
+
+    def _stage_rates(self, index, slot, now):
+        pid, rates = self._rates.get(index, (None, {}))
+        if pid != slot['pid']:
+            rates = {}  # A new worker process took over the slot
+        stage = slot['stage']
+        last = self._last.get(index)
+        key = (slot['pid'], slot['tasks'], stage)
+        if last is not None and last[:3] == key and now > last[4]:
+            current = (slot['num'] - last[3]) / (now - last[4])
+            previous = rates.get(stage)
+            rates[stage] = (current if previous is None else
+                            self.smoothing * current
+                            + (1 - self.smoothing) * previous)
+        self._last[index] = (*key, slot['num'], now)
+        self._rates[index] = (slot['pid'], rates)
+        return rates
+
+    def sample(self):
+        """
+        Returns:
+            list: One dict per slot: the slot fields plus 'slot', 'state'
+            (stage name or "stalled"), 'fraction', 'rate' (numbers/s in
+            the current stage), 'eta' (seconds or None) and 'age'
+            (seconds since the heartbeat, or None)
+        """
+        now = time.time()
+        statuses = []
+        for index, slot in enumerate(self.board.read_all()):
+            rates = self._stage_rates(index, slot, now)
+            stage, size = slot['stage'], slot['size']
+            busy = stage in (STAGE_SIEVE, STAGE_MATH)
+            age = now - slot['heartbeat'] if slot['heartbeat'] else None
+            stalled = busy and age is not None and age > self.stall_after
+
+            rate = rates.get(stage, 0.0) if busy else 0.0
+            eta = None
+            if busy and not stalled and rate > 0:
+                eta = (size - slot['num']) / rate
+                if stage == STAGE_SIEVE:
+                    math_rate = rates.get(STAGE_MATH)
+                    eta = eta + size / math_rate if math_rate else None
+            statuses.append({
+                **slot,
+                'slot': index,
+                'state': "stalled" if stalled else STAGE_NAMES[stage],
+                'fraction': fraction_done(slot),
+                'rate': rate,
+                'eta': eta,
+                'age': age
+            })
+        return statuses
+
+    def stalled(self):
+        """Returns the slots of busy workers whose heartbeat is too old."""
+        return [s['slot'] for s in self.sample() if s['state'] == "stalled"]
+
+
+def format_status(statuses):
+    """Formats one line per slot plus a total line."""
+    lines = []
+    for s in statuses:
+        eta = f"{s['eta']:6.1f}s" if s['eta'] is not None else "     -"
+        age = f"{s['age']:5.1f}s" if s['age'] is not None else "    -"
+        lines.append(
+            f"[slot {s['slot']:2d}] pid={s['pid']:<7d} task={s['tasks']:<3d} "
+            f"{s['state']:<7s} {s['fraction'] * 100:5.1f}% "
+            f"num={s['num']:<11d} primes={s['primes']:<9d} "
+            f"{s['rate'] / 1e6:7.2f} M num/s  eta={eta}  "
+            f"heartbeat={age} ago")
+    busy = [s for s in statuses if s['state'] in ("sieve", "math")]
+    stalled = sum(s['state'] == "stalled" for s in statuses)
+    etas = [s['eta'] for s in busy if s['eta'] is not None]
+    slowest = f"{max(etas):.1f}s" if etas else "-"
+    lines.append(f"[total] {len(busy)} busy, {stalled} stalled, "
+                 f"current tasks done in {slowest}")
+    return "\n".join(lines)
+
+
+def watch(board, interval=0.5, until=None, log=print):
+    """
+    Prints format_status every 'interval' seconds.
+
+    Args:
+        board (ProgressBoard): The board to watch
+        interval (float): Seconds between samples
+        until: Stop once until() returns True (default: Ctrl+C)
+        log: Called with each formatted sample
+    """
+    monitor = ProgressMonitor(board)
+    try:
+        while until is None or not until():
+            log(format_status(monitor.sample()))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+# Per-worker board and slot, set once by attach_worker
+_board = None
+_slot = None
+
+
+def attach_worker(board_name, counter):
+    """
+    Pool initializer: gives every worker process its own slot.
+
+    Args:
+        board_name (str): ProgressBoard.name
+        counter: multiprocessing.Value handing out slot numbers
+    """
+    global _board, _slot
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    _board = ProgressBoard(name=board_name)  # Keeps the mapping alive
+    _slot = _board.slot(index % _board.slots)
+
+
+def run_task(size):
+    """Pool task: do_something that reports to this worker's slot."""
+    out_list = []
+    do_something(size, out_list, progress=_slot)
+    return out_list[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Live progress of do_something workers")
+    parser.add_argument("command", nargs="?", default="demo",
+                        choices=["demo", "watch"])
+    parser.add_argument("--name", help="board to watch (printed by demo)")
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.command == "watch":
+        with ProgressBoard(name=args.name, track=False) as board:
+            watch(board, args.interval)
+    else:
+        set_quiet()
+        sizes = [4_000_000 + 1_000_000 * i for i in range(6)]
+        with ProgressBoard(args.workers) as board:
+            print(f"[Progress] board {board.name}; watch it from another "
+                  f"shell with: python progress_board.py watch "
+                  f"--name {board.name}")
+            counter = multiprocessing.Value("i", 0)
+            with multiprocessing.Pool(args.workers, attach_worker,
+                                      (board.name, counter)) as pool:
+                result = pool.map_async(run_task, sizes)
+                watch(board, args.interval, until=result.ready)
+                records = result.get()
+            print(format_status(ProgressMonitor(board).sample()))
+        print(f"[Progress] prime counts: "
+              f"{[r['prime_count'] for r in records]}")
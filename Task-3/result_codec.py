@@ -0,0 +1,151 @@
+# result_codec.py
+import multiprocessing
+import struct
+from do_something import do_something, set_quiet
+
+# Fixed little-endian layout of one do_something result:
+# prime_count (int64), math_result (float64), largest_prime (int64, -1 = None)
+RECORD = struct.Struct("<qdq")
+RECORD_SIZE = RECORD.size  # 24 bytes
+
+
+def encode(record):
+    """
+    Packs a do_something result record into RECORD_SIZE bytes.
+
+    Args:
+        record (dict): A record as stored in out_list by do_something
+
+    Returns:
+        bytes: The packed record
+    """
+    largest = record['largest_prime']
+    return RECORD.pack(record['prime_count'], record['math_result'],
+                       -1 if largest is None else largest)
+
+
+def decode(buffer, offset=0):
+    """
+    Unpacks one record without building a dict.
+
+    Returns:
+        tuple: (prime_count, math_result, largest_prime)
+    """
+    prime_count, math_result, largest = RECORD.unpack_from(buffer, offset)
+    return prime_count, math_result, None if largest < 0 else largest
+
+
+def as_dict(fields):
+    """Turns decoded fields back into the usual do_something record."""
+    prime_count, math_result, largest_prime = fields
+    return {
+        'prime_count': prime_count,
+        'math_result': math_result,
+        'largest_prime': largest_prime
+    }
+
+
+def send_record(conn, record):
+    """Sends one record over a Connection as raw bytes (no pickling)."""
+    conn.send_bytes(encode(record))
+
+
+def recv_record(conn, buffer=None):
+    """
+    Receives one record into a preallocated buffer.
+
+    Args:
+        conn: The receiving Connection
+        buffer (bytearray): Reused buffer of at least RECORD_SIZE bytes
+
+    Returns:
+        tuple: (prime_count, math_result, largest_prime)
+    """
+    if buffer is None:
+        buffer = bytearray(RECORD_SIZE)
+    conn.recv_bytes_into(buffer)
+    return decode(buffer)
+
+
+class RecordBatch:
+    """
+    Many records in one contiguous, preallocated buffer.
+
+    The sender fills it with append() and ships it with send(); the
+    receiver reuses one batch for every recv(), so receiving allocates
+    nothing once the buffer is large enough.
+
+    Args:
+        capacity (int): Number of records the buffer holds
+    """
+
+    def __init__(self, capacity):
+        self.buffer = bytearray(capacity * RECORD_SIZE)
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.buffer) // RECORD_SIZE
+
+    def append(self, record):
+        """Packs one record at the end of the batch."""
+        if self.count == self.capacity:
+            raise IndexError("RecordBatch is full")
+        largest = record['largest_prime']
+        RECORD.pack_into(self.buffer, self.count * RECORD_SIZE,
+                         record['prime_count'], record['math_result'],
+                         -1 if largest is None else largest)
+        self.count += 1
+
+    def send(self, conn):
+        """Sends the filled part of the buffer as one message."""
+        conn.send_bytes(self.buffer, 0, self.count * RECORD_SIZE)
+
+    def recv(self, conn):
+        """
+        Receives a batch sent with send(), replacing the contents.
+
+        Raises multiprocessing.BufferTooShort if the message holds more
+        records than 'capacity'.
+        """
+        self.count = conn.recv_bytes_into(self.buffer) // RECORD_SIZE
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yields (prime_count, math_result, largest_prime) tuples."""
+        view = memoryview(self.buffer)[:self.count * RECORD_SIZE]
+        for prime_count, math_result, largest in RECORD.iter_unpack(view):
+            yield prime_count, math_result, None if largest < 0 else largest
+
+    def as_dicts(self):
+        """Returns the records as the usual do_something dicts."""
+        return [as_dict(fields) for fields in self]
+
+
+def _batch_worker(conn, counts):
+    batch = RecordBatch(len(counts))
+    for count in counts:
+        out_list = []
+        do_something(count, out_list)
+        batch.append(out_list[0])
+    batch.send(conn)
+    conn.close()
+
+
+if __name__ == "__main__":
+    set_quiet()
+    counts = list(range(1, 1001))
+    parent_conn, child_conn = multiprocessing.Pipe()
+    p = multiprocessing.Process(target=_batch_worker,
+                                args=(child_conn, counts))
+    p.start()
+
+    batch = RecordBatch(len(counts))
+    batch.recv(parent_conn)
+    p.join()
+    print(f"Received {len(batch)} results in one "
+          f"{len(batch) * RECORD_SIZE}-byte message")
+    print("Last result:", batch.as_dicts()[-1])
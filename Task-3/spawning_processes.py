@@ -1,6 +1,6 @@
 # spawned_processes.py
-from multiprocessing import Process, set_start_method
 from do_something import do_something
+from process_startup import startup_context
 
 def worker(i):
     """
@@ -17,15 +17,13 @@ def worker(i):
           f"Math result={res['math_result']:.2f}")
 
 if __name__ == "__main__":
-    try:
-        # Windows default = spawn. Unix default = fork, but we force spawn for consistency
-        set_start_method("spawn")
-    except RuntimeError:
-        pass  # Method already set earlier
+    # Fork-free start-up on every platform: forkserver with do_something
+    # preloaded where available, plain spawn otherwise (Windows)
+    ctx = startup_context()
 
     workers = []
     for i in range(3):
-        p = Process(target=worker, args=(i,))
+        p = ctx.Process(target=worker, args=(i,))
         workers.append(p)
         p.start()
 
@@ -0,0 +1,272 @@
+# worker_profiler.py
+import argparse
+import cProfile
+import functools
+import glob
+import multiprocessing
+import os
+import pstats
+import signal
+import threading
+from collections import defaultdict
+from multiprocessing import util
+
+# Set PROFILE_WORKERS=<directory> (or call enable()) to profile every
+# @profiled call. It is read from the environment so that worker
+# processes inherit the setting, like DO_SOMETHING_QUIET.
+PROFILE_ENV = "PROFILE_WORKERS"
+
+# Deepest stack written to the collapsed-stack file
+MAX_DEPTH = 64
+
+# Calls between two writes of a running profile; it is also written when
+# its process exits or is terminated
+DUMP_EVERY = 100
+
+_local = threading.local()
+_lock = threading.Lock()
+_profiles = []        # (profiler, path) of every profiled thread
+_profiles_pid = None  # Process that _profiles and the exit hooks belong to
+
+
+def enable(directory):
+    """
+    Turns worker profiling on for this process and for worker processes
+    started afterwards.
+
+    Args:
+        directory (str): Where each process/thread writes its profile
+    """
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    os.environ[PROFILE_ENV] = directory
+
+
+def reset(directory=None):
+    """
+    Deletes old profiles, so a run only reports its own workers.
+
+    Does nothing when profiling is off and no directory is given.
+    """
+    directory = directory or profile_dir()
+    if directory is None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in profile_files(directory):
+        os.remove(path)
+
+
+def profile_dir():
+    """Returns the profile directory, or None when profiling is off."""
+    return os.environ.get(PROFILE_ENV) or None
+
+
+def profiled(func):
+    """
+    Decorator: profiles every call of 'func' when profiling is enabled.
+
+    Each process and thread keeps one cProfile.Profile that accumulates
+    over all its calls and is written to <dir>/<pid>-<thread id>.prof
+    every DUMP_EVERY calls and when the process exits. In worker
+    processes a SIGTERM handler writes it too, so the data survives
+    workers that are terminated, as Pool.__exit__ does. Decorated
+    module-level functions can still be sent to a Pool.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        directory = profile_dir()
+        if directory is None or getattr(_local, "active", False):
+            return func(*args, **kwargs)
+        if getattr(_local, "pid", None) != os.getpid():
+            # First call in this thread, or a forked copy of a parent's
+            # thread-local state: start a fresh profile
+            _local.pid = os.getpid()
+            _local.profiler = cProfile.Profile()
+            _local.path = os.path.join(
+                directory, f"{os.getpid()}-{threading.get_ident()}.prof")
+            _local.calls = 0
+            _register(_local.profiler, _local.path)
+        try:
+            _local.profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; threads
+            # that start while another one profiles run unprofiled
+            return func(*args, **kwargs)
+        _local.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.profiler.disable()
+            _local.active = False
+            _local.calls += 1
+            if _local.calls % DUMP_EVERY == 0:
+                _local.profiler.dump_stats(_local.path)
+
+    return wrapper
+
+
+def _register(profiler, path):
+    """Adds a thread's profile to those written when the process ends."""
+    global _profiles, _profiles_pid
+    with _lock:
+        if _profiles_pid != os.getpid():
+            # First profile of this process (a forked child inherits the
+            # parent's list, whose profiles are not its own)
+            _profiles, _profiles_pid = [], os.getpid()
+            # Finalizers run at normal exit of the main process and of
+            # multiprocessing children, which skip atexit handlers
+            util.Finalize(None, _dump_all, exitpriority=10)
+            _catch_terminate()
+        _profiles.append((profiler, path))
+
+
+def _dump_all():
+    with _lock:
+        profiles = list(_profiles) if _profiles_pid == os.getpid() else []
+    for profiler, path in profiles:
+        try:
+            profiler.dump_stats(path)
+        except OSError:
+            pass  # The profile directory is gone
+
+
+def _catch_terminate():
+    # Only in worker processes, and only if nobody else handles SIGTERM:
+    # write the profiles, then die of SIGTERM as before
+    if (multiprocessing.parent_process() is None
+            or threading.current_thread() is not threading.main_thread()
+            or signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL):
+        return
+
+    def on_terminate(signum, frame):
+        _dump_all()
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+    signal.signal(signal.SIGTERM, on_terminate)
+
+
+def profile_files(directory=None):
+    """Lists the per-process/thread profiles in 'directory'."""
+    directory = directory or profile_dir()
+    return sorted(glob.glob(os.path.join(directory, "*.prof")))
+
+
+def merge(directory=None):
+    """
+    Merges all per-process/thread profiles into one pstats.Stats.
+
+    The profiles of this process (e.g. of thread workers) are written
+    first, since they would otherwise only be written at exit.
+
+    Returns:
+        pstats.Stats: The merged statistics, or None if there are none
+    """
+    _dump_all()
+    files = profile_files(directory)
+    return pstats.Stats(*files) if files else None
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # Built-in function
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats, min_fraction=0.001):
+    """
+    Derives flame-graph stacks from a pstats.Stats.
+
+    cProfile only records caller -> callee edges, not whole stacks, so
+    each stack is reconstructed from the roots down. A function's time is
+    split between its callers in proportion to the time each caller spent
+    in it. Recursive edges and stacks below 'min_fraction' of the total
+    are dropped, so the result is an approximation of the real stacks.
+
+    Args:
+        stats (pstats.Stats): Merged statistics
+        min_fraction (float): Smallest share of total time kept
+
+    Returns:
+        dict: "frame;frame;frame" -> self time in seconds
+    """
+    entries = stats.stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    total = sum(e[2] for e in entries.values()) or 1.0
+    stacks = defaultdict(float)
+
+    def walk(func, path, weight):
+        _, _, tt, ct, _ = entries[func]
+        if weight * ct < min_fraction * total:
+            return
+        path = path + (func,)
+        if tt > 0:
+            stacks[";".join(_label(f) for f in path)] += weight * tt
+        if len(path) >= MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, {}).items():
+            callee_ct = entries[callee][3]
+            if callee not in path and callee_ct > 0:
+                walk(callee, path, weight * edge_ct / callee_ct)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, (), 1.0)
+    return dict(stacks)
+
+
+def write_collapsed(stacks, path):
+    """
+    Writes stacks in the collapsed format of flamegraph.pl/speedscope,
+    one "frame;frame;frame microseconds" line per stack.
+    """
+    with open(path, "w") as f:
+        for stack, seconds in sorted(stacks.items()):
+            f.write(f"{stack} {max(int(seconds * 1e6), 1)}\n")
+
+
+def report(directory=None, sort="cumulative", limit=25, collapsed=None):
+    """
+    Prints the merged pstats report and writes the collapsed stacks.
+
+    Does nothing when profiling is off and no directory is given.
+
+    Args:
+        directory (str): Profile directory (default: profile_dir())
+        sort (str): pstats sort key
+        limit (int): Number of functions printed
+        collapsed (str): Collapsed-stack output file
+            (default: <directory>/collapsed.txt)
+
+    Returns:
+        pstats.Stats: The merged statistics, or None
+    """
+    directory = directory or profile_dir()
+    if directory is None:
+        return None
+    stats = merge(directory)
+    if stats is None:
+        print(f"No worker profiles in {directory}")
+        return None
+    files = profile_files(directory)
+    print(f"=== Worker profile: {len(files)} processes/threads ===")
+    stats.sort_stats(sort).print_stats(limit)
+    collapsed = collapsed or os.path.join(directory, "collapsed.txt")
+    write_collapsed(collapsed_stacks(stats), collapsed)
+    print(f"Collapsed stacks written to {collapsed}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Merge worker profiles into one report")
+    parser.add_argument("directory", help="directory of *.prof files")
+    parser.add_argument("--sort", default="cumulative")
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--collapsed", help="collapsed-stack output file")
+    args = parser.parse_args()
+    report(args.directory, args.sort, args.limit, args.collapsed)